@@ -7,159 +7,364 @@ Original file is located at
     https://colab.research.google.com/drive/13CN7JKczZw61TlfAUdRkUKg6EZKwr7YD
 """
 
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
+from vectorized_features import FEATURES, OUTPUT_COLUMNS, transform
+
 # -1 = phishing
 #  0 = suspicious
 #  1 = legitimate
 
 
-# Load the input CSV file
-input_csv = "dataset_B_05_2020.csv"
-output_csv = "REAL_DATASET_FINAL.csv"
+def transform_rows(df):
+    """Original row-by-row transform, kept as the reference for vectorized_features.py."""
+    # New columns
+    df['having_IP_Address'] = df['ip'].apply(lambda x: -1 if x == 1 else 1 if x == 0 else x)
 
-# Read the CSV file into a DataFrame
-df = pd.read_csv(input_csv)
+    df['URL_Length'] = df['length_url'].apply(
+        lambda x: 1 if x < 54 else 0 if 54 <= x <= 75 else -1
+    )
 
-# New columns
-df['having_IP_Address'] = df['ip'].apply(lambda x: -1 if x == 1 else 1 if x == 0 else x)
+    df['Shortining_Service'] = df['shortening_service'].apply(
+        lambda x: -1 if x == 1 else 1 if x == 0 else x
+    )
 
-df['URL_Length'] = df['length_url'].apply(
-    lambda x: 1 if x < 54 else 0 if 54 <= x <= 75 else -1
-)
+    df['having_At_Symbol'] = df['nb_at'].apply(
+        lambda x: -1 if x >= 1 else 1 if x == 0 else x
+    )
 
-df['Shortining_Service'] = df['shortening_service'].apply(
-    lambda x: -1 if x == 1 else 1 if x == 0 else x
-)
+    # used paper version for this part (we can explain later yay)
+    df['double_slash_redirecting'] = df['nb_dslash'].apply(
+        lambda x: -1 if x >= 1 else 1 if x == 0 else x
+    )
 
-df['having_At_Symbol'] = df['nb_at'].apply(
-    lambda x: -1 if x >= 1 else 1 if x == 0 else x
-)
+    df['Prefix_Suffix'] = df['prefix_suffix'].apply(
+        lambda x: -1 if x == 1 else 1 if x == 0 else x
+    )
 
-# used paper version for this part (we can explain later yay)
-df['double_slash_redirecting'] = df['nb_dslash'].apply(
-    lambda x: -1 if x >= 1 else 1 if x == 0 else x
-)
+    df['having_Sub_Domain'] = df['nb_subdomains'].apply(
+        lambda x: 1 if x == 1 else 0 if x == 2 else -1
+    )
 
-df['Prefix_Suffix'] = df['prefix_suffix'].apply(
-    lambda x: -1 if x == 1 else 1 if x == 0 else x
-)
+    #WE SKIPPED 8 IN address bar features btw
 
-df['having_Sub_Domain'] = df['nb_subdomains'].apply(
-    lambda x: 1 if x == 1 else 0 if x == 2 else -1
-)
 
-#WE SKIPPED 8 IN address bar features btw
+    def classify_domain_registration_length(expiry_days):
+        if expiry_days <= 365:
+            return -1
+        else:
+            return 1
 
+    df['Domain_Registeration_Length'] = df['domain_registration_length'].apply(classify_domain_registration_length)
 
-def classify_domain_registration_length(expiry_days):
-    if expiry_days <= 365:
-        return -1
-    else:
-        return 1
+    df['Favicon'] = df['external_favicon'].apply(
+        lambda x: -1 if x == 1 else 1 if x == 0 else x
+    )
 
-df['Domain_Registeration_Length'] = df['domain_registration_length'].apply(classify_domain_registration_length)
+    #port is new
+    df['Port'] = df['port'].apply(
+        lambda x: -1 if x == 1 else 1 if x == 0 else x
+    )
 
-df['Favicon'] = df['external_favicon'].apply(
-    lambda x: -1 if x == 1 else 1 if x == 0 else x
-)
+    df['HTTPS_token'] = df['https_token'].apply(
+        lambda x: 1 if x == 1 else -1 if x == 0 else x
+    )
 
-#port is new
-df['Port'] = df['port'].apply(
-    lambda x: -1 if x == 1 else 1 if x == 0 else x
-)
+    #THIS ONE IS DIFFERENT TOO sort of
+    def extHyperlinks(ratio):
+        if ratio <= 0.22:
+            return 1
+        elif ratio >0.22 and ratio <= 0.61:
+            return 0
+        else:
+            return -1
 
-df['HTTPS_token'] = df['https_token'].apply(
-    lambda x: 1 if x == 1 else -1 if x == 0 else x
-)
+    df['Request_URL'] = df['ratio_extHyperlinks'].apply(extHyperlinks)
 
-#THIS ONE IS DIFFERENT TOO sort of
-def extHyperlinks(ratio):
-    if ratio <= 0.22:
-        return 1
-    elif ratio >0.22 and ratio <= 0.61:
-        return 0
-    else:
-        return -1
-
-df['Request_URL'] = df['ratio_extHyperlinks'].apply(extHyperlinks)
-
-#dont know if they can do thid
-#RATIO are like *100 so its their percent number not the number from 0 to 1
-def urlanchor(ratio):
-    ratio=1-0.01*ratio
-    if ratio < 0.31:
-        return 1
-    elif 0.31 <= ratio <= 0.67:
-        return 0
-    else:
-        return -1
+    #dont know if they can do thid
+    #RATIO are like *100 so its their percent number not the number from 0 to 1
+    def urlanchor(ratio):
+        ratio=1-0.01*ratio
+        if ratio < 0.31:
+            return 1
+        elif 0.31 <= ratio <= 0.67:
+            return 0
+        else:
+            return -1
 
-df['Anchor_URL'] = df['safe_anchor'].apply(urlanchor)
+    df['Anchor_URL'] = df['safe_anchor'].apply(urlanchor)
+
+    def linkstags(ratio):
+        ratio=1-0.01*ratio
+        if ratio < 0.17:
+            return 1
+        elif ratio >= 0.17 and ratio <= 0.81:
+            return 0
+        else:
+            return -1
+
+    df['Links_in_Tags'] = df['links_in_tags'].apply(linkstags)
 
-def linkstags(ratio):
-    ratio=1-0.01*ratio
-    if ratio < 0.17:
-        return 1
-    elif ratio >= 0.17 and ratio <= 0.81:
-        return 0
-    else:
-        return -1
+    # we removed Server Form Handler (SFH) because the training data has all 0s so it was kinda WTVVVVV
+
+    df['Abnormal_URL'] = df['whois_registered_domain'].apply(
+        lambda x: 1 if x == 1 else -1 if x == 0 else x
+    )
+
+    #we decided to change website forwarding to hyperlinks because it is in the top few features for the 3 diff filters? TABLE 6 PAPER
+    #we r gonna do later its pissing me off UGH NEED TO FIND A FUCKING THRESHOLD
+
+    #taking status bar customization out too the mouseover attribute
+    #taking out most of the HTML and JavaScript based Features but we still use ratio of eternal hyperlinks
 
-df['Links_in_Tags'] = df['links_in_tags'].apply(linkstags)
 
-# we removed Server Form Handler (SFH) because the training data has all 0s so it was kinda WTVVVVV
+    def classifydomainage(days):
+        if days >= 180:
+            return 1
+        else:
+            return -1
 
-df['Abnormal_URL'] = df['whois_registered_domain'].apply(
-    lambda x: 1 if x == 1 else -1 if x == 0 else x
-)
+    df['Domain_age'] = df['domain_age'].apply(classifydomainage)
 
-#we decided to change website forwarding to hyperlinks because it is in the top few features for the 3 diff filters? TABLE 6 PAPER
-#we r gonna do later its pissing me off UGH NEED TO FIND A FUCKING THRESHOLD
-
-#taking status bar customization out too the mouseover attribute
-#taking out most of the HTML and JavaScript based Features but we still use ratio of eternal hyperlinks
-
-
-def classifydomainage(days):
-    if days >= 180:
-        return 1
-    else:
-        return -1
+    df['DNS_record'] = df['dns_record'].apply(
+        lambda x: 1 if x == 1 else -1 if x == 0 else x
+    )
 
-df['Domain_age'] = df['domain_age'].apply(classifydomainage)
+    def classifytraffic(visitors):
+        if visitors > 1000000:
+            return 0
+        elif visitors <= 1000000 and visitors > 0:
+            return 1
+        else:
+            return -1
 
-df['DNS_record'] = df['dns_record'].apply(
-    lambda x: 1 if x == 1 else -1 if x == 0 else x
-)
+    df['Website_traffic'] = df['web_traffic'].apply(classifytraffic)
 
-def classifytraffic(visitors):
-    if visitors > 1000000:
-        return 0
-    elif visitors <= 1000000 and visitors > 0:
-        return 1
+    def classifypr(pr):
+        if pr < 2:
+            return -1
+        else:
+            return 1
+
+    df['Page_rank'] = df['page_rank'].apply(classifypr)
+
+    df['Google_Index'] = df['google_index'].apply(
+        lambda x: 1 if x == 1 else -1 if x == 0 else x
+    )
+
+    columns_to_keep = ['having_IP_Address', 'URL_Length', 'Shortining_Service', 'having_At_Symbol', 'double_slash_redirecting', 'Prefix_Suffix', 'having_Sub_Domain', 'Domain_Registeration_Length', 'Favicon', 'Port', 'HTTPS_token', 'Request_URL', 'Anchor_URL', 'Links_in_Tags', 'Abnormal_URL', 'Domain_age', 'DNS_record', 'Website_traffic', 'Page_rank', 'Google_Index', 'status' ]  # List of new columns
+    df = df[columns_to_keep]
+    return df
+
+
+# only the raw columns the transform reads, so the rest of dataset_B is never parsed
+RAW_COLUMNS = [raw for raw, _ in FEATURES.values()] + ['status']
+
+# Parquet, or uncompressed Arrow IPC for memory-mapped zero-copy reads (see model/dataset.py)
+COLUMNAR_EXTENSIONS = ('.parquet', '.arrow', '.feather')
+
+
+class ColumnarWriter:
+    """Appends DataFrames (or Arrow tables) to one .parquet or Arrow IPC file."""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, df):
+        pa = self.pa
+        table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            if self.path.endswith('.parquet'):
+                self.writer = self.pq.ParquetWriter(self.path, table.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.path, table.schema)
+        else:
+            # every chunk is written with the first chunk's types (int8 features)
+            table = table.cast(self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            # nothing was written, still leave a valid empty file behind
+            empty = {col: pd.Series(dtype='int8') for col in FEATURES}
+            empty['status'] = pd.Series(dtype='object')
+            self.write(pd.DataFrame(empty))
+        self.writer.close()
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.out = open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.out, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            pd.DataFrame(columns=OUTPUT_COLUMNS).to_csv(self.out, index=False)
+        self.out.close()
+
+
+def open_writer(path):
+    return ColumnarWriter(path) if path.endswith(COLUMNAR_EXTENSIONS) else CsvWriter(path)
+
+
+def convert(input_csv, output_path):
+    # Read the CSV file into a DataFrame
+    df = pd.read_csv(input_csv)
+
+    df = transform(df)
+
+    # Save the modified DataFrame to a new file
+    writer = open_writer(output_path)
+    writer.write(df)
+    writer.close()
+
+
+def convert_streaming(input_csv, output_path, chunksize):
+    """Transform chunksize rows at a time and append them to output_path.
+
+    Memory stays at roughly one chunk no matter how big the input is. A chunk
+    is typed on its own, so a column that only has NaNs in some chunks is
+    written as floats ("1.0") in those chunks only.
+    """
+    start = time.perf_counter()
+    rows = 0
+    reader = pd.read_csv(input_csv, chunksize=chunksize, usecols=RAW_COLUMNS)
+    writer = open_writer(output_path)
+    try:
+        for i, chunk in enumerate(reader):
+            writer.write(transform(chunk))
+            rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"chunk {i + 1}: {rows} rows, {rows / max(elapsed, 1e-9):,.0f} rows/s", flush=True)
+    finally:
+        writer.close()
+    return rows
+
+
+def split_ranges(input_csv, shards):
+    """Header line plus (start, end) byte ranges of the data, cut on line boundaries.
+
+    Assumes no quoted field contains a newline, which holds for dataset_B.
+    """
+    size = os.path.getsize(input_csv)
+    with open(input_csv, 'rb') as f:
+        header = f.readline()
+        bounds = [f.tell()]
+        for i in range(1, shards):
+            f.seek(bounds[0] + (size - bounds[0]) * i // shards)
+            f.readline()  # finish the line we landed in, it belongs to the previous range
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return header, list(zip(bounds[:-1], bounds[1:]))
+
+
+def _convert_range(job):
+    input_csv, header, start, end, shard_path = job
+    with open(input_csv, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    df = transform(pd.read_csv(io.BytesIO(header + data), usecols=RAW_COLUMNS))
+    writer = ColumnarWriter(shard_path)
+    writer.write(df)
+    writer.close()
+    return len(df), {col: df[col].dtype.str for col in FEATURES}
+
+
+def _shard_frame(shard_path, dtypes):
+    from pyarrow import feather
+    return feather.read_feather(shard_path, memory_map=True).astype(dtypes)
+
+
+def _render_csv(job):
+    shard_path, csv_path, dtypes = job
+    _shard_frame(shard_path, dtypes).to_csv(csv_path, index=False, header=False)
+    os.remove(shard_path)
+    return csv_path
+
+
+def convert_parallel(input_csv, output_path, workers, shard_bytes=64 * 1024 * 1024):
+    """Transform byte-range shards in a process pool and stitch them back in input order.
+
+    Each shard is typed on its own (a NaN makes a column float in that shard
+    only), so the shards are first written as Arrow and every column is then
+    cast to the type the whole file would have had, like convert() gives it:
+    float if any shard is float, else int64 if any shard needed it, else int8.
+    """
+    size = os.path.getsize(input_csv)
+    header, ranges = split_ranges(input_csv, max(workers, -(-size // shard_bytes)))
+    columnar = output_path.endswith(COLUMNAR_EXTENSIONS)
+    tmp_dir = tempfile.mkdtemp(prefix='features-', dir=os.path.dirname(os.path.abspath(output_path)))
+    jobs = [(input_csv, header, start, end, os.path.join(tmp_dir, f'{i:05d}.arrow'))
+            for i, (start, end) in enumerate(ranges)]
+
+    start_time = time.perf_counter()
+    rows = 0
+    writer = open_writer(output_path)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shard_types = []
+            for i, (count, dtypes) in enumerate(pool.map(_convert_range, jobs)):
+                shard_types.append(dtypes)
+                rows += count
+                elapsed = time.perf_counter() - start_time
+                print(f"shard {i + 1}/{len(jobs)}: {rows} rows, "
+                      f"{rows / max(elapsed, 1e-9):,.0f} rows/s", flush=True)
+            schema = {col: np.result_type(*[np.dtype(types[col]) for types in shard_types]) for col in FEATURES}
+
+            if columnar:
+                for job in jobs:
+                    writer.write(_shard_frame(job[-1], schema))
+                    os.remove(job[-1])
+            else:
+                pd.DataFrame(columns=OUTPUT_COLUMNS).to_csv(writer.out, index=False)
+                writer.header = False
+                # rendering the CSV text is the slow part, so it runs in the pool too
+                renders = [(job[-1], job[-1][:-len('.arrow')] + '.csv', schema) for job in jobs]
+                for csv_path in pool.map(_render_csv, renders):
+                    with open(csv_path, 'r', newline='') as shard:
+                        shutil.copyfileobj(shard, writer.out)
+                    os.remove(csv_path)
+    finally:
+        writer.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build REAL_DATASET_FINAL.csv from the raw dataset')
+    parser.add_argument('--input', default="dataset_B_05_2020.csv")
+    parser.add_argument('--output', default="REAL_DATASET_FINAL.csv",
+                        help='.csv, or .parquet / .arrow (.feather) for typed int8 columnar output')
+    parser.add_argument('--chunksize', type=int, help='stream the input this many rows at a time')
+    parser.add_argument('--workers', type=int, help='transform byte-range shards in this many processes')
+    args = parser.parse_args()
+
+    if args.workers:
+        convert_parallel(args.input, args.output, args.workers)
+    elif args.chunksize:
+        convert_streaming(args.input, args.output, args.chunksize)
     else:
-        return -1
-
-df['Website_traffic'] = df['web_traffic'].apply(classifytraffic)
-
-def classifypr(pr):
-    if pr < 2:
-        return -1
-    else:
-        return 1
-
-df['Page_rank'] = df['page_rank'].apply(classifypr)
-
-df['Google_Index'] = df['google_index'].apply(
-    lambda x: 1 if x == 1 else -1 if x == 0 else x
-)
-
-columns_to_keep = ['having_IP_Address', 'URL_Length', 'Shortining_Service', 'having_At_Symbol', 'double_slash_redirecting', 'Prefix_Suffix', 'having_Sub_Domain', 'Domain_Registeration_Length', 'Favicon', 'Port', 'HTTPS_token', 'Request_URL', 'Anchor_URL', 'Links_in_Tags', 'Abnormal_URL', 'Domain_age', 'DNS_record', 'Website_traffic', 'Page_rank', 'Google_Index', 'status' ]  # List of new columns
-df = df[columns_to_keep]
-
-# Save the modified DataFrame to a new CSV file
-df.to_csv(output_csv, index=False)
-
-print(f"Transformed CSV saved to {output_csv}")
+        convert(args.input, args.output)
 
+    print(f"Transformed dataset saved to {args.output}")
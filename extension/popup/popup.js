@@ -27,7 +27,7 @@ document.addEventListener('DOMContentLoaded', async () => {
         analysisResult.innerHTML = `
             <h3 style="color: ${headerColor}">Analysis Result</h3>
             <div class="prediction"><strong>Verdict: ${result.prediction}</strong></div>
-            <div class="extraction-time">Time: ${result.extractionTime}ms</div>
+            <div class="extraction-time">${result.cached ? 'Cached verdict' : `Time: ${result.extractionTime}ms`}</div>
         `;
         
         analysisResult.className = `message-box ${resultClass}`;
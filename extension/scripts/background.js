@@ -1,5 +1,27 @@
+async function cachedVerdict(url) {
+    try {
+        const response = await fetch(`http://localhost:5000/verdict?url=${encodeURIComponent(url)}`);
+        if (!response.ok) {
+            return null; // 404 = not cached (or expired)
+        }
+        return await response.json();
+    } catch (error) {
+        return null;
+    }
+}
+
 async function analyzeUrl(url) {
     try {
+        // Step 0: recent verdict for this URL, skips extraction entirely
+        const cached = await cachedVerdict(url);
+        if (cached && cached.success) {
+            return {
+                success: true,
+                prediction: cached.message,
+                cached: true
+            };
+        }
+
         // Step 1: Feature extraction from Node.js server
         const featureResponse = await fetch('http://localhost:3000/extract-features', {
             method: 'POST',
@@ -12,11 +34,17 @@ async function analyzeUrl(url) {
             throw new Error(featureResult.error);
         }
 
-        // Step 2: Send features to Python model server
+        // Step 2: Send features to Python model server. The server only caches the
+        // verdict for the url when it is configured with this install's verdict token
+        const headers = { 'Content-Type': 'application/json' };
+        const { verdictToken } = await chrome.storage.local.get('verdictToken');
+        if (verdictToken) {
+            headers['X-Verdict-Token'] = verdictToken;
+        }
         const modelResponse = await fetch('http://localhost:5000/predict', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(featureResult.features)
+            headers,
+            body: JSON.stringify({ ...featureResult.features, url })
         });
 
         const modelResult = await modelResponse.json();
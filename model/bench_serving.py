@@ -0,0 +1,204 @@
+"""Latency / throughput benchmark for the serving path.
+
+Replays feature vectors against a running server's /predict (or
+/predict/batch) endpoint, or in-process against modelServer.predict_url /
+predict_batch, at a given concurrency and batch size:
+
+    python bench_serving.py --target http --url http://127.0.0.1:5000 --concurrency 16
+    python bench_serving.py --target inproc --data REAL_DATASET_FINAL.csv --batch-size 64
+
+Each run reports p50/p95/p99 latency, requests/s, rows/s and RSS, and is
+appended to --output (a JSON list) so runs can be compared over time.
+--compare takes an earlier results file and fails when p99 latency or
+throughput is worse than the last matching run by more than --tolerance.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from metrics import rss_mb
+
+FEATURES = [
+    'having_IP_Address', 'URL_Length', 'Shortining_Service',
+    'having_At_Symbol', 'double_slash_redirecting', 'Prefix_Suffix',
+    'having_Sub_Domain', 'Domain_Registeration_Length', 'Favicon',
+    'Port', 'HTTPS_token', 'Request_URL', 'Anchor_URL',
+    'Links_in_Tags', 'Abnormal_URL', 'Domain_age', 'DNS_record',
+    'Website_traffic', 'Page_rank', 'Google_Index'
+]
+
+
+def load_vectors(path=None, synthetic=1000, seed=0):
+    if path:
+        from dataset import load_dataset
+        df = load_dataset(path, columns=FEATURES)
+        return [{k: int(v) for k, v in row.items()} for row in df.to_dict('records')]
+    rng = np.random.default_rng(seed)
+    values = rng.integers(-1, 2, size=(synthetic, len(FEATURES)))
+    return [dict(zip(FEATURES, map(int, row))) for row in values]
+
+
+class HttpTarget:
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        return conn
+
+    def _post(self, path, payload):
+        conn = self._conn()
+        conn.request('POST', path, body=json.dumps(payload), headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(f'{path} returned {response.status}: {body[:200]!r}')
+
+    def predict(self, vector):
+        self._post('/predict', vector)
+
+    def predict_batch(self, vectors):
+        self._post('/predict/batch', vectors)
+
+
+class InprocTarget:
+    def __init__(self):
+        import modelServer
+        if modelServer.current.model is None:
+            raise RuntimeError('modelServer could not load a model (run from the model directory)')
+        self.server = modelServer
+
+    def predict(self, vector):
+        self.server.predict_url(self.server.current, vector, self.server.SCORING_MODE)
+
+    def predict_batch(self, vectors):
+        active = self.server.current
+        self.server.predict_batch(active.model, vectors, features=active.features)
+
+
+def run(target, vectors, requests, concurrency, batch_size, warmup=50):
+    for i in range(min(warmup, requests)):
+        target.predict(vectors[i % len(vectors)])
+
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(w):
+        for i in range(w, requests, concurrency):
+            start_row = (i * batch_size) % len(vectors)
+            t = time.perf_counter()
+            try:
+                if batch_size > 1:
+                    batch = [vectors[(start_row + j) % len(vectors)] for j in range(batch_size)]
+                    target.predict_batch(batch)
+                else:
+                    target.predict(vectors[start_row])
+            except Exception:
+                errors[w] += 1
+                continue
+            latencies[w].append(time.perf_counter() - t)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = np.concatenate([np.asarray(l) for l in latencies]) if requests else np.empty(0)
+    done = len(all_latencies)
+    pct = (lambda q: float(np.percentile(all_latencies, q) * 1000)) if done else (lambda q: None)
+    return {
+        'requests': done,
+        'errors': sum(errors),
+        'elapsed_s': elapsed,
+        'latency_ms': {'p50': pct(50), 'p95': pct(95), 'p99': pct(99),
+                       'mean': float(all_latencies.mean() * 1000) if done else None},
+        'requests_per_s': done / elapsed if elapsed else None,
+        'rows_per_s': done * batch_size / elapsed if elapsed else None,
+    }
+
+
+def compare(result, baseline_path, tolerance):
+    """True when result is no worse than the last matching run in baseline_path."""
+    with open(baseline_path) as f:
+        runs = json.load(f)
+    same_setup = [r for r in runs if all(r['config'].get(k) == result['config'].get(k)
+                                         for k in ('target', 'concurrency', 'batch_size'))]
+    if not same_setup:
+        print(f"No run with the same target/concurrency/batch size in {baseline_path}")
+        return True
+    base = same_setup[-1]
+    ok = True
+    p99, base_p99 = result['latency_ms']['p99'], base['latency_ms']['p99']
+    if p99 is not None and base_p99 and p99 > base_p99 * (1 + tolerance):
+        print(f"REGRESSION p99: {base_p99:.3f} ms -> {p99:.3f} ms")
+        ok = False
+    rps, base_rps = result['requests_per_s'], base['requests_per_s']
+    if rps is not None and base_rps and rps < base_rps * (1 - tolerance):
+        print(f"REGRESSION throughput: {base_rps:,.0f} -> {rps:,.0f} req/s")
+        ok = False
+    if ok:
+        print(f"No regression against {base.get('label') or base['created']}")
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark /predict and predict_url')
+    parser.add_argument('--target', choices=['http', 'inproc'], default='http')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--data', help='dataset to take feature vectors from (csv/parquet/arrow)')
+    parser.add_argument('--synthetic', type=int, default=1000, help='random ternary vectors when --data is not given')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=1, help='>1 sends /predict/batch (predict_batch inproc)')
+    parser.add_argument('--server-pid', type=int, help='pid to report RSS for in http mode')
+    parser.add_argument('--label', help='name for this run, e.g. a commit or model version')
+    parser.add_argument('--output', default='serving_benchmarks.json')
+    parser.add_argument('--compare', metavar='RESULTS', help='fail if worse than the last matching run in this file')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.data, args.synthetic)
+    target = HttpTarget(args.url) if args.target == 'http' else InprocTarget()
+    result = run(target, vectors, args.requests, args.concurrency, args.batch_size)
+    result.update({
+        'label': args.label,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {'target': args.target, 'url': args.url if args.target == 'http' else None,
+                   'concurrency': args.concurrency, 'batch_size': args.batch_size,
+                   'vectors': args.data or f'synthetic:{args.synthetic}'},
+        # in http mode only the server's RSS is meaningful, and only if we know its pid
+        'rss_mb': rss_mb() if args.target == 'inproc' else (rss_mb(args.server_pid) if args.server_pid else None),
+    })
+
+    lat = result['latency_ms']
+    print(f"{result['requests']} requests ({result['errors']} errors) in {result['elapsed_s']:.2f} s")
+    if result['requests']:
+        print(f"latency p50 {lat['p50']:.3f} ms, p95 {lat['p95']:.3f} ms, p99 {lat['p99']:.3f} ms")
+        print(f"{result['requests_per_s']:,.0f} req/s, {result['rows_per_s']:,.0f} rows/s, RSS {result['rss_mb']} MB")
+
+    ok = compare(result, args.compare, args.tolerance) if args.compare else True
+
+    runs = []
+    if os.path.exists(args.output):
+        with open(args.output) as f:
+            runs = json.load(f)
+    runs.append(result)
+    with open(args.output, 'w') as f:
+        json.dump(runs, f, indent=2)
+    print(f"Results appended to {args.output}")
+    sys.exit(0 if ok else 1)
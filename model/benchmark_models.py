@@ -0,0 +1,169 @@
+"""Accuracy / latency benchmark for the candidate models.
+
+Loads and splits the dataset once, then fits and times every candidate
+(the models from model_implementation.py plus their hyperparameter grids)
+in a process pool, and writes one JSON report:
+
+    python benchmark_models.py --output benchmark_report.json --workers 8
+
+Per candidate: accuracy, fit time, single-row predict latency (p50/p99),
+batched predict latency, throughput and pickled model size.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import pickle
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from dataset import DATASET
+from training import SERVED_DROP, load_xy, split
+
+
+def grid(params):
+    keys = list(params)
+    for values in itertools.product(*(params[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def label(name, params):
+    return name + ''.join(f' {k}={v}' for k, v in params.items())
+
+
+def candidates(include_lstm=False):
+    """(name, unfitted estimator) for every model and grid point to benchmark."""
+    out = []
+    for params in grid({'n_estimators': [10, 50, 100], 'max_depth': [None, 8, 16]}):
+        out.append((label('random_forest', params), RandomForestClassifier(random_state=42, **params)))
+    for params in grid({'max_depth': [None, 8, 16]}):
+        out.append((label('decision_tree', params), DecisionTreeClassifier(random_state=42, **params)))
+    out.append(('logistic_regression', LogisticRegression(max_iter=1000, random_state=42)))
+    out.append(('naive_bayes', GaussianNB()))
+    out.append(('svm', make_pipeline(StandardScaler(), SVC(kernel='rbf', random_state=42))))
+    for k in range(1, 20):
+        out.append((f'knn k={k}', make_pipeline(StandardScaler(), KNeighborsClassifier(n_neighbors=k))))
+    if include_lstm:
+        out.append(('lstm', 'lstm'))
+    return out
+
+
+def load_split(path, test_size=0.2, seed=42):
+    # the served forest's features and split (training.py), so the random_forest rows measure that model
+    X, y = load_xy(path, drop=SERVED_DROP)
+    X_train, X_test, y_train, y_test = split(X.to_numpy(dtype=np.float32), y.to_numpy(), test_size, seed)
+    return X_train, X_test, y_train, y_test
+
+
+_data = None
+
+
+def _init_worker(data):
+    global _data
+    _data = data
+
+
+def _fit_lstm(X_train, y_train, epochs):
+    # tensorflow is only imported when the LSTM is actually benchmarked
+    from training import train_lstm
+    predict, model, _ = train_lstm(X_train, y_train, epochs=epochs)
+    return predict, model.count_params() * 4
+
+
+def evaluate(name, estimator, latency_rows=200, lstm_epochs=20):
+    X_train, X_test, y_train, y_test = _data
+
+    start = time.perf_counter()
+    if estimator == 'lstm':
+        predict, size = _fit_lstm(X_train, y_train, lstm_epochs)
+    else:
+        estimator.fit(X_train, y_train)
+        predict, size = estimator.predict, len(pickle.dumps(estimator))
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = predict(X_test)
+    batch_time = time.perf_counter() - start
+
+    single = []
+    for row in X_test[:latency_rows]:
+        row = row.reshape(1, -1)
+        t = time.perf_counter()
+        predict(row)
+        single.append(time.perf_counter() - t)
+
+    return {
+        'model': name,
+        'accuracy': float(accuracy_score(y_test, y_pred)),
+        'fit_time_s': fit_time,
+        'single_row_latency_ms': {
+            'p50': float(np.percentile(single, 50) * 1000),
+            'p99': float(np.percentile(single, 99) * 1000),
+        },
+        'batch_latency_ms': batch_time * 1000,
+        'batch_rows': len(X_test),
+        'throughput_rows_per_s': len(X_test) / batch_time if batch_time else None,
+        'model_size_bytes': size,
+    }
+
+
+def run(path, workers, include_lstm=False, latency_rows=200, lstm_epochs=20):
+    data = load_split(path)
+    todo = candidates(include_lstm)
+    results = []
+    # workers get the split once through the initializer, not once per candidate
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+        futures = {pool.submit(evaluate, name, est, latency_rows, lstm_epochs): name for name, est in todo}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'model': futures[future], 'error': str(e)}
+            results.append(result)
+            print(f"{result['model']}: " + (f"accuracy {result['accuracy']:.4f}, "
+                  f"p50 {result['single_row_latency_ms']['p50']:.3f} ms"
+                  if 'error' not in result else f"failed: {result['error']}"), flush=True)
+
+    order = {name: i for i, (name, _) in enumerate(todo)}
+    results.sort(key=lambda r: order[r['model']])
+    return {
+        'dataset': path,
+        'train_rows': len(data[0]),
+        'test_rows': len(data[1]),
+        'split': {'test_size': 0.2, 'random_state': 42},
+        'sklearn_version': sklearn.__version__,
+        'python_version': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark candidate models on accuracy and latency')
+    parser.add_argument('--data', default=DATASET)
+    parser.add_argument('--output', default='benchmark_report.json')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--latency-rows', type=int, default=200, help='rows timed one at a time per model')
+    parser.add_argument('--lstm', action='store_true', help='also benchmark the LSTM (needs tensorflow)')
+    parser.add_argument('--lstm-epochs', type=int, default=20)
+    args = parser.parse_args()
+
+    report = run(args.data, args.workers, args.lstm, args.latency_rows, args.lstm_epochs)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {args.output}")
@@ -0,0 +1,198 @@
+"""Compaction of the reference random forest for cheaper verdicts.
+
+Builds smaller candidates next to the reference forest and measures each
+on the held-out split:
+
+  - subsets of the reference's own trees (no retraining)
+  - forests retrained with fewer trees, limited depth and, optionally,
+    only the most important features of the reference
+  - trees and small forests distilled from the reference: fitted on its
+    predictions over the training rows plus extra rows resampled from
+    the training columns, so they copy its decision boundary
+
+Every candidate gets accuracy, loss and agreement against the reference,
+node count, artifact/pickle size and compiled-engine latency. The most
+accurate one that fits the per-verdict budget is exported as the artifact
+modelServer.py loads:
+
+    python compact_forest.py --budget-ms 0.15 --max-loss 0.005 --export random_forest_model.forest
+"""
+
+import argparse
+import copy
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.tree import DecisionTreeClassifier
+
+from dataset import DATASET
+from forest_engine import CompiledForest
+from training import SERVED_DROP, export_forest, load_xy, split
+
+
+def load_split(path=DATASET, test_size=0.2, seed=42):
+    # same preparation and split as the random forest in model_implementation.py
+    X, y = load_xy(path, drop=SERVED_DROP)
+    return split(X, y, test_size, seed)
+
+
+def tree_subset(forest, n):
+    """The forest's first n trees, without refitting."""
+    subset = copy.copy(forest)
+    subset.estimators_ = forest.estimators_[:n]
+    subset.n_estimators = n
+    # a later fit() must start over, and the out-of-bag results describe the whole forest
+    subset.warm_start = False
+    for attr in ('oob_score_', 'oob_decision_function_'):
+        subset.__dict__.pop(attr, None)
+    return subset
+
+
+def resample(X, n, seed=0):
+    """n rows whose columns are drawn independently from X's columns."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({col: rng.choice(X[col].to_numpy(), size=n) for col in X.columns})
+
+
+def candidates(reference, X_train, y_train, top_features=10, seed=42):
+    """(name, fitted model) for every compaction candidate, the reference first."""
+    out = [('reference', reference)]
+    for n in (10, 25, 50):
+        if n < len(reference.estimators_):
+            out.append((f'subset n={n}', tree_subset(reference, n)))
+
+    importances = pd.Series(reference.feature_importances_, index=X_train.columns).sort_values(ascending=False)
+    feature_sets = {'all': list(X_train.columns)}
+    if top_features < len(X_train.columns):
+        feature_sets[f'top{top_features}'] = list(importances.index[:top_features])
+    for label, features in feature_sets.items():
+        for n in (10, 25, 50):
+            for depth in (8, 12, 16):
+                model = RandomForestClassifier(n_estimators=n, max_depth=depth, random_state=seed, n_jobs=-1)
+                model.fit(X_train[features], y_train)
+                out.append((f'forest n={n} depth={depth} features={label}', model))
+
+    # distillation: the student learns the reference's answers, including on rows it never saw
+    X_distill = pd.concat([X_train, resample(X_train, 2 * len(X_train), seed)], ignore_index=True)
+    y_distill = reference.predict(X_distill)
+    for depth in (6, 8, 10, 12, None):
+        model = DecisionTreeClassifier(max_depth=depth, random_state=seed).fit(X_distill, y_distill)
+        out.append((f'distilled tree depth={depth}', model))
+    for n in (5, 10):
+        for depth in (10, 16):
+            model = RandomForestClassifier(n_estimators=n, max_depth=depth, random_state=seed, n_jobs=-1)
+            model.fit(X_distill, y_distill)
+            out.append((f'distilled forest n={n} depth={depth}', model))
+    return out
+
+
+def measure(name, model, X_test, y_test, reference_pred, reference_accuracy, latency_rows=300):
+    compiled = CompiledForest.from_sklearn(model)
+    features = list(getattr(model, 'feature_names_in_', X_test.columns))
+    X = X_test[features].to_numpy(dtype=np.float32)
+
+    start = time.perf_counter()
+    y_pred = compiled.predict(X)
+    batch_time = time.perf_counter() - start
+
+    single = []
+    for row in X[:latency_rows]:
+        row = row.reshape(1, -1)
+        t = time.perf_counter()
+        compiled.predict(row)
+        single.append(time.perf_counter() - t)
+
+    accuracy = float(accuracy_score(y_test, y_pred))
+    return {
+        'model': name,
+        'n_trees': compiled.n_estimators,
+        'nodes': int(len(compiled.feature)),
+        'features': features,
+        'accuracy': accuracy,
+        'accuracy_loss': reference_accuracy - accuracy if reference_accuracy is not None else 0.0,
+        'agreement': float(np.mean(y_pred == reference_pred)) if reference_pred is not None else 1.0,
+        'artifact_bytes': int(sum(getattr(compiled, name).nbytes for name in
+                                  ('feature', 'threshold', 'left', 'right', 'missing_left', 'is_leaf', 'value'))),
+        'pickle_bytes': len(pickle.dumps(model)),
+        'latency_ms': {'p50': float(np.percentile(single, 50) * 1000),
+                       'p99': float(np.percentile(single, 99) * 1000)},
+        'rows_per_s': len(X) / batch_time if batch_time else None,
+    }
+
+
+def compact(reference, X_train, y_train, X_test, y_test, top_features=10, latency_rows=300):
+    """Measure every candidate; returns (report rows, {name: model})."""
+    models = dict(candidates(reference, X_train, y_train, top_features))
+    ref = measure('reference', reference, X_test, y_test, None, None, latency_rows)
+    reference_pred = CompiledForest.from_sklearn(reference).predict(X_test[ref['features']].to_numpy(dtype=np.float32))
+    rows = [ref]
+    for name, model in models.items():
+        if name != 'reference':
+            rows.append(measure(name, model, X_test, y_test, reference_pred, ref['accuracy'], latency_rows))
+    for row in rows:
+        row['size_ratio'] = row['artifact_bytes'] / ref['artifact_bytes']
+        row['speedup_p50'] = ref['latency_ms']['p50'] / row['latency_ms']['p50']
+    return rows, models
+
+
+def pick(rows, budget_ms=None, max_loss=None):
+    """Most accurate candidate within the latency budget and accuracy loss; None if nothing fits."""
+    fits = [r for r in rows
+            if (budget_ms is None or r['latency_ms']['p50'] <= budget_ms)
+            and (max_loss is None or r['accuracy_loss'] <= max_loss)]
+    if not fits:
+        return None
+    return max(fits, key=lambda r: (r['accuracy'], -r['latency_ms']['p50']))
+
+
+def print_report(rows, chosen=None):
+    print(f"{'model':<40} {'acc':>7} {'loss':>7} {'agree':>7} {'nodes':>8} {'size':>6} {'p50 ms':>8} {'speedup':>8}")
+    for r in rows:
+        mark = ' *' if chosen is not None and r['model'] == chosen['model'] else ''
+        print(f"{r['model']:<40} {r['accuracy']:>7.4f} {r['accuracy_loss']:>+7.4f} {r['agreement']:>7.4f} "
+              f"{r['nodes']:>8} {r['size_ratio']:>6.2f} {r['latency_ms']['p50']:>8.3f} {r['speedup_p50']:>7.1f}x{mark}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compact the random forest to a latency budget')
+    parser.add_argument('--data', default=DATASET)
+    parser.add_argument('--reference', help='fitted forest pickle (default: fit the model_implementation.py forest)')
+    parser.add_argument('--budget-ms', type=float, help='single-row p50 latency budget per verdict')
+    parser.add_argument('--max-loss', type=float, help='largest accuracy loss against the reference to accept')
+    parser.add_argument('--top-features', type=int, default=10, help='size of the importance-ranked feature subset')
+    parser.add_argument('--report', default='compact_report.json')
+    parser.add_argument('--export', metavar='PATH', help='write the chosen candidate as a .forest artifact')
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = load_split(args.data)
+    if args.reference:
+        import joblib
+        reference = joblib.load(args.reference)
+    else:
+        reference = RandomForestClassifier(random_state=42).fit(X_train, y_train)
+
+    rows, models = compact(reference, X_train, y_train, X_test, y_test, args.top_features)
+    chosen = pick(rows, args.budget_ms, args.max_loss)
+    print_report(rows, chosen)
+    with open(args.report, 'w') as f:
+        json.dump({'dataset': args.data, 'budget_ms': args.budget_ms, 'max_loss': args.max_loss,
+                   'chosen': chosen and chosen['model'], 'cpu_count': os.cpu_count(),
+                   'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': rows}, f, indent=2)
+    print(f"Report saved to {args.report}")
+
+    if chosen is None:
+        print("No candidate fits the budget")
+        sys.exit(1)
+    print(f"Chosen: {chosen['model']} (accuracy {chosen['accuracy']:.4f}, p50 {chosen['latency_ms']['p50']:.3f} ms)")
+    if args.export:
+        export_forest(models[chosen['model']], args.export, model=chosen['model'], compacted_from='RandomForestClassifier',
+                      test_accuracy=chosen['accuracy'], accuracy_loss=chosen['accuracy_loss'],
+                      latency_p50_ms=chosen['latency_ms']['p50'])
+        print(f"Exported to {args.export}")
@@ -0,0 +1,42 @@
+"""Loading the feature dataset for the training scripts.
+
+REAL_DATASET_FINAL can be a .csv, a .parquet file or an uncompressed Arrow
+IPC file (.arrow/.feather), as written by all_features_extracted.py
+--output. Parquet and Arrow reads are memory-mapped and only decode the
+requested columns; Arrow IPC reads of the int8 feature columns are
+effectively zero-copy.
+"""
+
+import os
+
+import pandas as pd
+
+DATASET = os.environ.get('DATASET', 'REAL_DATASET_FINAL.csv')
+
+# feature groups for the per-category experiments
+URL_FEATURES = [
+    'having_IP_Address', 'URL_Length', 'Shortining_Service', 'having_At_Symbol',
+    'double_slash_redirecting', 'Prefix_Suffix', 'having_Sub_Domain', 'Port',
+    'HTTPS_token',
+]
+CONTENT_FEATURES = ['Favicon', 'Request_URL', 'Anchor_URL', 'Links_in_Tags']
+EXTERNAL_FEATURES = [
+    'Domain_Registeration_Length', 'Abnormal_URL', 'Domain_age', 'DNS_record',
+    'Website_traffic', 'Page_rank', 'Google_Index',
+]
+
+
+def load_dataset(path=DATASET, columns=None):
+    """DataFrame with just `columns` (all of them when None)."""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns, memory_map=True)
+    if path.endswith(('.arrow', '.feather')):
+        from pyarrow import feather
+        return feather.read_feather(path, columns=columns, memory_map=True)
+    return pd.read_csv(path, usecols=columns)
+
+
+def encode_status(df):
+    """The status column as 1 = legitimate, 0 = phishing, like the models were trained on."""
+    df['status'] = pd.get_dummies(df['status'])['legitimate'].astype('int')
+    return df
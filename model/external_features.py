@@ -0,0 +1,320 @@
+"""Concurrent resolver for the external (network-backed) features.
+
+The DNS, WHOIS, page rank and Google index lookups are grouped into
+sources. A FeatureResolver runs every source for a URL concurrently, each
+with its own timeout, and caches each source's answer per registered
+domain for a TTL, so every URL on a popular domain reuses one lookup.
+Lookups that are already in flight for a domain are shared rather than
+repeated. Failed or timed-out lookups fall back to the same defaults the
+Node extractor uses and are cached for a shorter time.
+
+Feature values follow extraction/feature_extraction.js so the output can
+be merged straight into a /predict request.
+
+Sources are plain objects with `name`, `timeout`, `fallback` and an async
+`fetch(domain)`, so local stand-ins (StaticSource) can replace the live
+services:
+
+    python external_features.py https://example.com/login http://example.com/
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit
+from urllib.request import Request, urlopen
+
+log = logging.getLogger('modelServer.resolver')
+
+# second-level labels under which registrations happen one level down (example.co.uk)
+SECOND_LEVEL = {'ac', 'co', 'com', 'edu', 'gov', 'net', 'org', 'ne', 'or', 'go'}
+# DNS labels: letters, digits and inner hyphens, so a name can never read as a command-line option
+HOSTNAME = re.compile(r'^(?!-)[a-z0-9-]{1,63}(?<!-)(?:\.(?!-)[a-z0-9-]{1,63}(?<!-))*$')
+
+
+def registered_domain(host):
+    """Best-effort registrable domain of a hostname, without a public suffix list."""
+    host = (host or '').lower().rstrip('.')
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return host
+    except ValueError:
+        pass
+    labels = host.split('.')
+    if len(labels) >= 3 and labels[-2] in SECOND_LEVEL and len(labels[-1]) == 2:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def lookup_domain(url):
+    """Registered domain of url, checked to be a plain hostname or IP address before any source sees it."""
+    host = urlsplit(url if '//' in url else f'http://{url}').hostname
+    domain = registered_domain(host)
+    try:
+        ipaddress.ip_address(domain)
+        return domain
+    except ValueError:
+        pass
+    if len(domain) > 253 or not HOSTNAME.match(domain):
+        raise ValueError(f'not a valid hostname: {host!r}')
+    return domain
+
+
+def _get_json(url, headers=None, timeout=5.0):
+    with urlopen(Request(url, headers=headers or {}), timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+class DnsSource:
+    name = 'dns'
+    fallback = {'DNS_record': 0}
+
+    def __init__(self, timeout=2.0):
+        self.timeout = timeout
+
+    async def fetch(self, domain):
+        try:
+            await asyncio.get_running_loop().getaddrinfo(domain, None)
+        except OSError:
+            return {'DNS_record': -1}
+        return {'DNS_record': 1}
+
+
+class WhoisSource:
+    """Runs the system `whois` client; the year arithmetic matches the Node extractor."""
+    name = 'whois'
+    fallback = {'Domain_Registeration_Length': 0, 'Domain_age': 0, 'Abnormal_URL': 1}
+    CREATED = re.compile(r'^\s*Creation Date:\s*(\d{4})', re.MULTILINE | re.IGNORECASE)
+    EXPIRES = re.compile(r'^\s*(?:Registrar Registration Expiration|Registry Expiry) Date:\s*(\d{4})',
+                         re.MULTILINE | re.IGNORECASE)
+
+    def __init__(self, timeout=5.0, command='whois'):
+        self.timeout = timeout
+        self.command = command
+
+    async def fetch(self, domain):
+        proc = await asyncio.create_subprocess_exec(
+            self.command, '--', domain, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        try:
+            out, _ = await proc.communicate()
+        except asyncio.CancelledError:
+            proc.kill()
+            raise
+        text = out.decode('utf-8', errors='replace')
+        created, expires = self.CREATED.search(text), self.EXPIRES.search(text)
+        if not (created and expires):
+            raise ValueError(f'no creation/expiration date in whois output for {domain}')
+        year = time.localtime().tm_year
+        return {
+            'Domain_Registeration_Length': -1 if int(expires.group(1)) - year <= 1 else 1,
+            'Domain_age': 1 if year - int(created.group(1)) >= 1 else -1,
+            'Abnormal_URL': -1,
+        }
+
+
+class PageRankSource:
+    name = 'page_rank'
+    fallback = {'Page_rank': -1, 'Website_traffic': -1}
+    ENDPOINT = 'https://openpagerank.com/api/v1.0/getPageRank'
+
+    def __init__(self, api_key, timeout=3.0):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    async def fetch(self, domain):
+        url = f"{self.ENDPOINT}?{urlencode({'domains[]': domain})}"
+        data = await asyncio.to_thread(_get_json, url, {'API-OPR': self.api_key}, self.timeout)
+        entry = (data.get('response') or [{}])[0]
+        rank = entry.get('page_rank_decimal') or 0
+        traffic = entry.get('rank') or 0
+        return {'Page_rank': -1 if float(rank) < 2 else 1,
+                'Website_traffic': -1 if float(traffic) < 3 else 1}
+
+
+class GoogleIndexSource:
+    name = 'google_index'
+    fallback = {'Google_Index': 1}
+    ENDPOINT = 'https://customsearch.googleapis.com/customsearch/v1'
+
+    def __init__(self, api_key, search_engine_id, timeout=3.0):
+        self.api_key = api_key
+        self.search_engine_id = search_engine_id
+        self.timeout = timeout
+
+    async def fetch(self, domain):
+        query = urlencode({'key': self.api_key, 'cx': self.search_engine_id, 'q': f'site:{domain}', 'num': 1})
+        data = await asyncio.to_thread(_get_json, f'{self.ENDPOINT}?{query}', None, self.timeout)
+        return {'Google_Index': -1 if data.get('items') else 1}
+
+
+class StaticSource:
+    """Stand-in source returning fixed features after an optional delay; counts its fetches."""
+
+    def __init__(self, name, features, delay=0.0, timeout=1.0, fallback=None):
+        self.name = name
+        self.features = features
+        self.delay = delay
+        self.timeout = timeout
+        self.fallback = fallback if fallback is not None else dict(features)
+        self.calls = 0
+
+    async def fetch(self, domain):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return dict(self.features)
+
+
+def default_sources():
+    """Live sources; the API-backed ones only when their keys are set (same variables as the Node service)."""
+    sources = [DnsSource(), WhoisSource()]
+    page_rank_key = os.environ.get('PAGE_RANK_API_KEY')
+    if page_rank_key:
+        sources.append(PageRankSource(page_rank_key))
+    google_key = os.environ.get('GOOGLE_API_KEY')
+    search_engine_id = os.environ.get('SEARCH_ENGINE_ID') or os.environ.get('searchEngineId')
+    if google_key and search_engine_id:
+        sources.append(GoogleIndexSource(google_key, search_engine_id))
+    return sources
+
+
+class FeatureResolver:
+    """Caches each source's answer per registered domain; use it from a single event loop.
+
+    At most `concurrency` lookups per source run at once (a source's own
+    `concurrency` attribute overrides it); the rest wait their turn inside
+    their timeout, so a burst of new domains can't start unbounded whois
+    processes or API calls.
+    """
+
+    def __init__(self, sources, ttl=3600.0, error_ttl=60.0, maxsize=100000, concurrency=8, clock=time.monotonic):
+        self.sources = list(sources)
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.maxsize = maxsize
+        self.concurrency = concurrency
+        self.clock = clock
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._limits = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _store(self, key, features, ttl):
+        self._cache[key] = (self.clock() + ttl, features)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    async def _limited(self, source, domain):
+        limit = self._limits.get(source.name)
+        if limit is None:
+            limit = self._limits[source.name] = asyncio.Semaphore(getattr(source, 'concurrency', self.concurrency))
+        async with limit:
+            return await source.fetch(domain)
+
+    async def _fetch(self, source, domain):
+        key = (source.name, domain)
+        try:
+            features = await asyncio.wait_for(self._limited(source, domain), source.timeout)
+            ttl = self.ttl
+        except Exception as e:
+            self.errors += 1
+            log.warning(f"{source.name} lookup failed for {domain}: {type(e).__name__}: {e}")
+            features = dict(source.fallback)
+            ttl = self.error_ttl
+        self._store(key, features, ttl)
+        return features
+
+    async def _lookup(self, source, domain):
+        key = (source.name, domain)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > self.clock():
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(source, domain))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # one caller giving up must not cancel the lookup the others are waiting on
+        return dict(await asyncio.shield(task))
+
+    async def resolve(self, url):
+        domain = lookup_domain(url)
+        features = {}
+        for part in await asyncio.gather(*(self._lookup(source, domain) for source in self.sources)):
+            features.update(part)
+        return domain, features
+
+    async def resolve_many(self, urls):
+        return await asyncio.gather(*(self.resolve(url) for url in urls))
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'sources': [source.name for source in self.sources],
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            'cached': len(self._cache),
+            'inflight': len(self._inflight),
+        }
+
+
+class BackgroundResolver:
+    """Runs a FeatureResolver on its own event loop thread for synchronous callers (Flask views)."""
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        # like MicroBatcher: the loop thread doesn't survive fork, each worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self.resolver._inflight = {}
+                self.resolver._limits = {}
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+                self._pid = os.getpid()
+
+    def resolve(self, url, timeout=None):
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self.resolver.resolve(url), self._loop).result(timeout)
+
+    def stats(self):
+        return self.resolver.stats()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Resolve the external features for URLs')
+    parser.add_argument('urls', nargs='*')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if not args.urls:
+        parser.print_help()
+        raise SystemExit(0)
+
+    resolver = FeatureResolver(default_sources())
+    for (domain, features), url in zip(asyncio.run(resolver.resolve_many(args.urls)), args.urls):
+        print(json.dumps({'url': url, 'domain': domain, 'features': features}))
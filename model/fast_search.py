@@ -0,0 +1,140 @@
+"""Hyperparameter search that reuses work across candidates.
+
+KNN: each fold's neighbours are looked up once at the largest k, and the
+vote for every smaller k is read off the same neighbour list, instead of
+one cross_val_score per k.
+
+Random forest: one warm_start forest per (max_depth, max_features) is
+grown tree count by tree count and scored out-of-bag at each size, instead
+of refitting and cross-validating every size. Trees added by warm_start
+are the same ones a fresh fit of that size would build, so the best
+forest is just the first n trees of the grown one.
+
+Folds and forest configurations run in parallel. The best forest is
+refit-free and can be exported straight to the artifact modelServer.py
+loads:
+
+    python fast_search.py --export random_forest_model.forest
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier, NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+
+from compact_forest import load_split, tree_subset
+from dataset import DATASET
+from training import export_forest
+
+
+def _knn_fold(X, y, train, val, max_k, classes):
+    scaler = StandardScaler().fit(X[train])
+    nn = NearestNeighbors(n_neighbors=max_k).fit(scaler.transform(X[train]))
+    _, idx = nn.kneighbors(scaler.transform(X[val]))
+    # votes[:, k-1, c] = how many of the k nearest neighbours have class c
+    labels = np.searchsorted(classes, y[train][idx])
+    votes = np.cumsum(np.eye(len(classes), dtype=np.int32)[labels], axis=1)
+    # argmax takes the first class on a tie, like KNeighborsClassifier
+    predictions = classes[np.argmax(votes, axis=2)]
+    return (predictions == y[val][:, None]).mean(axis=0)
+
+
+def knn_cv_curve(X, y, max_k=49, cv=5, n_jobs=-1):
+    """Mean cross-validated accuracy for k = 1..max_k, same folds as cross_val_score(cv=5)."""
+    X, y = np.asarray(X, dtype=np.float64), np.asarray(y)
+    classes = np.unique(y)
+    folds = StratifiedKFold(n_splits=cv).split(X, y)
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_knn_fold)(X, y, train, val, max_k, classes) for train, val in folds)
+    return np.mean(scores, axis=0)
+
+
+def _grow_forest(X, y, sizes, max_depth, max_features, seed):
+    forest = RandomForestClassifier(n_estimators=sizes[0], max_depth=max_depth, max_features=max_features,
+                                    warm_start=True, oob_score=True, random_state=seed)
+    curve = []
+    for n in sizes:
+        forest.n_estimators = n
+        forest.fit(X, y)
+        curve.append(float(forest.oob_score_))
+    return forest, curve
+
+
+def forest_oob_search(X, y, sizes=(25, 50, 100, 200), max_depths=(None, 8, 16),
+                      max_features=('sqrt', 0.5), seed=42, n_jobs=-1):
+    """OOB accuracy per config and tree count; returns (results, best forest truncated to its best size)."""
+    sizes = sorted(sizes)
+    configs = [(depth, features) for depth in max_depths for features in max_features]
+    grown = Parallel(n_jobs=n_jobs)(
+        delayed(_grow_forest)(X, y, sizes, depth, features, seed) for depth, features in configs)
+    results = []
+    for (depth, features), (forest, curve) in zip(configs, grown):
+        for n, score in zip(sizes, curve):
+            results.append({'max_depth': depth, 'max_features': features, 'n_estimators': n,
+                            'oob_accuracy': score, 'forest': forest})
+    # prefer fewer trees on equal OOB accuracy, they are cheaper to serve
+    best = max(results, key=lambda r: (r['oob_accuracy'], -r['n_estimators']))
+    model = tree_subset(best['forest'], best['n_estimators'])
+    model.oob_score_ = best['oob_accuracy']
+    for r in results:
+        del r['forest']
+    return results, model
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='KNN and random forest hyperparameter search')
+    parser.add_argument('--data', default=DATASET)
+    parser.add_argument('--knn-max-k', type=int, default=49)
+    parser.add_argument('--trees', default='25,50,100,200', help='forest sizes to score out-of-bag')
+    parser.add_argument('--depths', default='none,8,16')
+    parser.add_argument('--max-features', default='sqrt,0.5')
+    parser.add_argument('--workers', type=int, default=-1)
+    parser.add_argument('--report', default='search_report.json')
+    parser.add_argument('--export', metavar='PATH', help='write the best forest as a .forest artifact')
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = load_split(args.data)
+
+    start = time.perf_counter()
+    knn_curve = knn_cv_curve(X_train.to_numpy(), y_train.to_numpy(), args.knn_max_k, n_jobs=args.workers)
+    knn_time = time.perf_counter() - start
+    best_k = int(np.argmax(knn_curve)) + 1
+    print(f"KNN: best k={best_k}, CV accuracy {knn_curve[best_k - 1]:.4f} ({knn_time:.2f} s for {args.knn_max_k} k)")
+
+    start = time.perf_counter()
+    forest_results, forest = forest_oob_search(
+        X_train, y_train,
+        sizes=[int(n) for n in args.trees.split(',')],
+        max_depths=[None if d.lower() == 'none' else int(d) for d in args.depths.split(',')],
+        max_features=[f if f in ('sqrt', 'log2') else float(f) for f in args.max_features.split(',')],
+        n_jobs=args.workers,
+    )
+    forest_time = time.perf_counter() - start
+    test_accuracy = float(accuracy_score(y_test, forest.predict(X_test)))
+    params = {'n_estimators': forest.n_estimators, 'max_depth': forest.max_depth, 'max_features': forest.max_features}
+    print(f"Forest: best {params}, OOB accuracy {forest.oob_score_:.4f}, test accuracy {test_accuracy:.4f} "
+          f"({forest_time:.2f} s for {len(forest_results)} candidates)")
+
+    with open(args.report, 'w') as f:
+        json.dump({
+            'dataset': args.data,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'cpu_count': os.cpu_count(),
+            'knn': {'cv_accuracy': knn_curve.tolist(), 'best_k': best_k, 'seconds': knn_time},
+            'forest': {'results': forest_results, 'best': params, 'oob_accuracy': forest.oob_score_,
+                       'test_accuracy': test_accuracy, 'seconds': forest_time},
+        }, f, indent=2)
+    print(f"Report saved to {args.report}")
+
+    if args.export:
+        export_forest(forest, args.export, train_rows=len(X_train), test_rows=len(X_test),
+                      oob_accuracy=forest.oob_score_, test_accuracy=test_accuracy)
+        print(f"Exported to {args.export}")
@@ -0,0 +1,124 @@
+"""Versioned, memory-mappable model artifact for the server.
+
+Layout of a .forest file:
+
+    8 bytes   magic b'PHFOREST'
+    4 bytes   format version (little-endian uint32)
+    4 bytes   header length (little-endian uint32)
+    header    JSON: feature order, classes, label names, training metadata
+              and the dtype/shape/offset of every node array
+    arrays    raw little-endian node arrays, each 64-byte aligned
+
+Loading maps the file read-only and builds the CompiledForest on top of
+views into that mapping, so startup costs no parsing or copying and every
+server process reading the same file shares its pages through the page
+cache.
+"""
+
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from forest_engine import CompiledForest, compile_model
+
+MAGIC = b'PHFOREST'
+FORMAT_VERSION = 1
+ALIGN = 64
+ARRAYS = ['feature', 'threshold', 'left', 'right', 'missing_left', 'is_leaf', 'value', 'roots']
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def save_artifact(model, path, label_names=None, metadata=None):
+    compiled = model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+    feature_names = getattr(compiled, 'feature_names_in_', None)
+    arrays = {name: np.ascontiguousarray(getattr(compiled, name)) for name in ARRAYS}
+
+    header = {
+        'format': 'phish-forest',
+        'version': FORMAT_VERSION,
+        'feature_names': None if feature_names is None else [str(name) for name in feature_names],
+        'n_features': int(compiled.n_features_in_),
+        'n_estimators': int(compiled.n_estimators),
+        'classes': np.asarray(compiled.classes_).tolist(),
+        'label_names': {str(k): v for k, v in (label_names or {}).items()},
+        'metadata': {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), **(metadata or {})},
+        'arrays': {},
+    }
+    # offsets depend on the header size, so lay the arrays out relative to the data start first
+    offset = 0
+    for name, arr in arrays.items():
+        header['arrays'][name] = {
+            'dtype': arr.dtype.newbyteorder('<').str,
+            'shape': list(arr.shape),
+            'offset': offset,
+        }
+        offset = _aligned(offset + arr.nbytes)
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _aligned(16 + len(header_bytes))
+
+    # write next to the target and rename, so a server mapping the old file keeps a valid view
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<II', FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(arr.astype(header['arrays'][name]['dtype'], copy=False).tobytes())
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        magic = f.read(8)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a forest artifact')
+        version, header_len = struct.unpack('<II', f.read(8))
+        if version != FORMAT_VERSION:
+            raise ValueError(f'{path} has artifact version {version}, expected {FORMAT_VERSION}')
+        header = json.loads(f.read(header_len).decode('utf-8'))
+    header['data_start'] = _aligned(16 + header_len)
+    return header
+
+
+def load_artifact(path):
+    header = read_header(path)
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, info in header['arrays'].items():
+        dtype = np.dtype(info['dtype'])
+        count = int(np.prod(info['shape']))
+        start = header['data_start'] + info['offset']
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=start).reshape(info['shape'])
+
+    forest = CompiledForest(
+        feature=arrays['feature'],
+        threshold=arrays['threshold'],
+        left=arrays['left'],
+        right=arrays['right'],
+        missing_left=arrays['missing_left'],
+        value=arrays['value'],
+        roots=arrays['roots'],
+        classes=np.asarray(header['classes']),
+        n_features=header['n_features'],
+        feature_names=header['feature_names'],
+        is_leaf=arrays['is_leaf'],
+    )
+    forest.artifact_header = header
+    return forest
+
+
+def load_forest(path):
+    """Model ready for batch scoring: the artifact itself, or a pickle compiled when possible."""
+    if path.endswith('.forest'):
+        return load_artifact(path)
+    import joblib
+    model = joblib.load(path)
+    return compile_model(model) or model
@@ -0,0 +1,249 @@
+"""Flat-array inference engine for the sklearn tree models.
+
+The fitted trees are copied into one set of contiguous node arrays
+(feature, threshold, left, right, leaf value) and every tree is walked at
+the same time with numpy, one depth level per step. Predictions match
+sklearn exactly; run `python forest_engine.py --check` to verify that on
+the held-out split. predict_proba_early() can stop walking trees for rows
+whose outcome is already decided.
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots,
+                 classes, n_features, feature_names=None, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.n_estimators = len(roots)
+        self.is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+        self.n_features_in_ = n_features
+        self._views = None
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        # forests expose estimators_, a single DecisionTreeClassifier is its own only tree
+        trees = getattr(model, 'estimators_', None)
+        if trees is None:
+            trees = [model]
+        if getattr(model, 'n_outputs_', 1) != 1 or not hasattr(model, 'classes_'):
+            raise TypeError(f'cannot compile {type(model).__name__}: need a single-output tree classifier')
+        if not all(hasattr(tree, 'tree_') for tree in trees):
+            raise TypeError(f'cannot compile {type(model).__name__}: estimators are not trees')
+
+        feature, threshold, left, right, missing_left, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in trees:
+            tree = estimator.tree_
+            n = tree.node_count
+            idx = np.arange(n) + offset
+            is_leaf = tree.children_left == -1
+            # leaves point at themselves so extra traversal steps are no-ops
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            left.append(np.where(is_leaf, idx, tree.children_left + offset))
+            right.append(np.where(is_leaf, idx, tree.children_right + offset))
+            mgl = getattr(tree, 'missing_go_to_left', None)
+            missing_left.append(np.zeros(n, dtype=bool) if mgl is None else np.asarray(mgl, dtype=bool))
+            # same normalisation as DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :].astype(np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(proba / normalizer)
+            roots.append(offset)
+            offset += n
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.int32),
+            threshold=np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(left), dtype=np.int32),
+            right=np.ascontiguousarray(np.concatenate(right), dtype=np.int32),
+            missing_left=np.ascontiguousarray(np.concatenate(missing_left)),
+            value=np.ascontiguousarray(np.concatenate(value)),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            n_features=int(model.n_features_in_),
+            feature_names=getattr(model, 'feature_names_in_', None),
+        )
+
+    def apply(self, X):
+        """Leaf index reached in every tree, shape (n_rows, n_trees)."""
+        return self._walk(X, self.roots)
+
+    def _walk(self, X, roots):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_cols = X.shape
+        flat_x = X.ravel()
+        # flat (row, tree) pairs; pairs that reach a leaf drop out of the active set
+        nodes = np.tile(roots, n_rows)
+        row_start = np.repeat(np.arange(n_rows) * n_cols, len(roots))
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            cur = nodes[active]
+            x = flat_x[row_start[active] + self.feature[cur]]
+            go_left = (x <= self.threshold[cur]) | (np.isnan(x) & self.missing_left[cur])
+            nxt = np.where(go_left, self.left[cur], self.right[cur])
+            nodes[active] = nxt
+            active = active[~self.is_leaf[nxt]]
+        return nodes.reshape(n_rows, len(roots))
+
+    def predict_proba(self, X):
+        leaf_values = self.value[self.apply(X)]
+        # sklearn adds the trees up one at a time in order; cumsum keeps that order so ties break the same way
+        total = np.cumsum(leaf_values, axis=1)[:, -1]
+        return total / self.n_estimators
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def predict_proba_early(self, X, block_size=10, confidence=None):
+        """predict_proba that stops adding trees to a row once its outcome is settled.
+
+        Trees are walked in blocks of block_size. A row stops when the trees
+        left could no longer change its top class, so its class always matches
+        predict(); with confidence it also stops once the mean probability of
+        its top class over the trees so far (at least block_size of them)
+        reaches that value. Returns the
+        probabilities averaged over the trees each row used, and that count.
+
+        A single row is walked one tree at a time in plain Python instead:
+        at batch size one the numpy walk costs the same per depth level no
+        matter how few trees it covers, so blocks would save nothing.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_trees = len(X), self.n_estimators
+        if n_rows == 1:
+            total, used = self._early_row(X[0], confidence, block_size)
+            return np.asarray([total]) / used, np.asarray([used])
+        total = np.zeros((n_rows, self.value.shape[1]))
+        used = np.zeros(n_rows, dtype=np.int64)
+        active = np.arange(n_rows)
+        for start in range(0, n_trees, block_size):
+            roots = self.roots[start:start + block_size]
+            leaves = self._walk(X[active], roots)
+            part = total[active]
+            # one tree at a time, same summation order as predict_proba
+            for t in range(len(roots)):
+                part += self.value[leaves[:, t]]
+            total[active] = part
+            done = start + len(roots)
+            used[active] = done
+            if part.shape[1] < 2:
+                break
+            # every remaining tree adds at most 1 to any class, so a lead bigger than that is final
+            top = np.partition(part, -2, axis=1)
+            settled = top[:, -1] - top[:, -2] > n_trees - done
+            if confidence is not None:
+                settled |= top[:, -1] / done >= confidence
+            active = active[~settled]
+            if not active.size:
+                break
+        return total / used[:, None], used
+
+    def _early_row(self, x, confidence, min_trees):
+        if self._views is None:
+            # memoryviews index straight into the (possibly memory-mapped) arrays as Python scalars
+            self._views = (self.roots.tolist(), memoryview(self.feature), memoryview(self.threshold),
+                           memoryview(self.left), memoryview(self.right), memoryview(self.missing_left),
+                           memoryview(self.is_leaf), memoryview(self.value))
+        roots, feature, threshold, left, right, missing_left, is_leaf, value = self._views
+        x = x.tolist()
+        n_classes, n_trees = self.value.shape[1], self.n_estimators
+        total = [0.0] * n_classes
+        done = 0
+        for node in roots:
+            while not is_leaf[node]:
+                v = x[feature[node]]
+                node = left[node] if v <= threshold[node] or (v != v and missing_left[node]) else right[node]
+            for c in range(n_classes):
+                total[c] += value[node, c]
+            done += 1
+            if n_classes > 1:
+                top, second = sorted(total)[-2:][::-1]
+                if top - second > n_trees - done or (
+                        confidence is not None and done >= min_trees and top / done >= confidence):
+                    break
+        return total, done
+
+
+def compile_model(model):
+    """CompiledForest for model, or None when it isn't a tree classifier we can flatten."""
+    try:
+        return CompiledForest.from_sklearn(model)
+    except (TypeError, AttributeError) as e:
+        logging.getLogger(__name__).warning(f"Compiled engine unavailable, using sklearn: {e}")
+        return None
+
+
+def check_parity(model_path, data_path):
+    import joblib
+    from training import load_xy, split
+
+    model = joblib.load(model_path)
+    compiled = CompiledForest.from_sklearn(model)
+
+    # same preparation and split as model_implementation.py
+    X, y = load_xy(data_path)
+    if hasattr(model, 'feature_names_in_'):
+        X = X[list(model.feature_names_in_)]
+    _, X_test, _, _ = split(X, y)
+
+    start = time.perf_counter()
+    expected_proba = model.predict_proba(X_test)
+    expected = model.predict(X_test)
+    sklearn_time = time.perf_counter() - start
+
+    X_test = X_test.to_numpy(dtype=np.float32)
+    start = time.perf_counter()
+    got_proba = compiled.predict_proba(X_test)
+    got = compiled.predict(X_test)
+    compiled_time = time.perf_counter() - start
+
+    print(f"Rows checked: {len(X_test)}")
+    print(f"sklearn: {sklearn_time * 1000:.1f} ms, compiled: {compiled_time * 1000:.1f} ms")
+    ok = np.array_equal(expected, got) and np.array_equal(expected_proba, got_proba)
+    if not ok:
+        print(f"MISMATCH: {int((expected != got).sum())} predictions differ, "
+              f"max proba diff {np.abs(expected_proba - got_proba).max()}")
+    else:
+        print("Predictions and probabilities match sklearn exactly")
+
+    # margin-only early exit must never change a prediction
+    start = time.perf_counter()
+    early_proba, used = compiled.predict_proba_early(X_test)
+    early_time = time.perf_counter() - start
+    early = compiled.classes_.take(np.argmax(early_proba, axis=1), axis=0)
+    print(f"early exit: {early_time * 1000:.1f} ms, {used.mean():.1f} of {compiled.n_estimators} trees per row on average")
+    if not np.array_equal(expected, early):
+        print(f"MISMATCH: {int((expected != early).sum())} early-exit predictions differ")
+        ok = False
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compiled forest engine tools')
+    parser.add_argument('--check', action='store_true', help='compare against sklearn on the held-out split')
+    parser.add_argument('--model', default='./random_forest_model.pkl')
+    parser.add_argument('--data', default='REAL_DATASET_FINAL.csv')
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if check_parity(args.model, args.data) else 1)
+    parser.print_help()
@@ -0,0 +1,74 @@
+"""Production serving for modelServer.py.
+
+    cd model && gunicorn -c gunicorn.conf.py
+
+The app (and the forest) is loaded once in the master and the workers are
+forked from it, so they share the model pages copy-on-write instead of each
+unpickling their own copy. When MODEL_PATH changes on disk each worker
+loads, validates and swaps the new model in place (hot_reload.py), keeping
+its threads and warm caches; a .forest artifact is memory-mapped, so the
+workers still share its pages. SIGHUP reloads the model in the master and
+gracefully replaces the workers, keeping the old model if the new one is
+rejected. The workers share their metrics through METRICS_DIR, so any
+worker answering /metrics reports the totals of all of them.
+
+Settings come from the environment:
+    MODEL_SERVER_BIND     address to listen on (0.0.0.0:5000)
+    MODEL_SERVER_WORKERS  worker processes (one per core)
+    MODEL_SERVER_THREADS  threads per worker (4)
+    MODEL_RELOAD_INTERVAL seconds between model file checks, 0 to disable (5)
+    METRICS_DIR           where the workers write their metrics (a new temporary directory)
+"""
+
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+wsgi_app = 'modelServer:app'
+bind = os.environ.get('MODEL_SERVER_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('MODEL_SERVER_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('MODEL_SERVER_THREADS', '4'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = True
+graceful_timeout = 30
+
+# read by modelServer on import, which happens after this file with preload_app
+if not os.environ.get('METRICS_DIR'):
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='phish-metrics-')
+
+
+def _freeze_heap():
+    # keep the collector from touching (and so un-sharing) everything loaded before the fork
+    gc.collect()
+    gc.freeze()
+
+
+def on_starting(server):
+    # totals left by a previous server in the same directory would be added to this one's
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], '*.json')):
+        os.remove(path)
+
+
+def when_ready(server):
+    _freeze_heap()
+
+
+def worker_exit(server, worker):
+    # the last increments since the periodic flush; the totals stay in the directory after the worker
+    import modelServer
+    modelServer.registry.flush()
+
+
+def on_reload(server):
+    # preload_app means HUP doesn't re-import the app, so swap the model in the master here;
+    # the new workers are forked right after this returns
+    import modelServer
+    gc.unfreeze()
+    modelServer.reloader.reload(modelServer.MODEL_PATH, wait=True)
+    # the master serves no traffic, so without RELOAD_VALIDATION_FROM this is deferred to the workers
+    status = modelServer.reloader.status
+    if status['state'] != 'installed':
+        server.log.error(f"Model reload {status['state']}: {status.get('error')}")
+    _freeze_heap()
@@ -0,0 +1,210 @@
+"""Hot swap of the serving model.
+
+A replacement model is loaded and checked in a background thread while the
+current one keeps serving requests:
+
+  - it has to load and predict known classes on a held-out sample: a
+    validation CSV, or at least `min_sample` vectors the live cache served
+    recently. Without either the swap is deferred (the watcher retries once
+    traffic has filled the cache), never checked on made-up rows
+  - on that sample it has to agree with the serving model at least
+    `min_agreement` of the time: a weekly retrain moves a few verdicts, a
+    broken export or a shuffled feature order moves most of them
+  - its prediction cache is warmed with the vectors the old cache served
+    most recently, so the first requests after the swap aren't all misses
+
+Only then is it installed, as one assignment, so every request sees either
+the old model or the new one and a rejected artifact never serves at all.
+ModelWatcher starts a reload when the artifact on disk changes.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from ternary_cache import load_feature_rows
+
+log = logging.getLogger('modelServer.reload')
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ServingModel:
+    """Everything a request needs from one loaded model, swapped as a unit."""
+
+    def __init__(self, path, loaded, engine, model, features, cache=None, signature=None):
+        self.path = path
+        # the unpickled estimator (or artifact) as loaded
+        self.loaded = loaded
+        # what scores rows, before and after the prediction cache wraps it
+        self.engine = engine
+        self.model = model
+        self.features = list(features)
+        self.cache = cache
+        self.signature = signature
+        self.loaded_at = time.time()
+
+    def describe(self):
+        header = getattr(self.engine, 'artifact_header', None) or {}
+        return {
+            'path': self.path,
+            'engine': type(self.engine).__name__ if self.engine is not None else None,
+            'features': len(self.features),
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+            'artifact_created': header.get('metadata', {}).get('created'),
+        }
+
+
+def reorder(X, features, to_features):
+    """X's columns rearranged from one feature order to another; features X lacks become NaN."""
+    index = {name: i for i, name in enumerate(features)}
+    out = np.full((len(X), len(to_features)), np.nan, dtype=np.float32)
+    for j, name in enumerate(to_features):
+        i = index.get(name)
+        if i is not None:
+            out[:, j] = X[:, i]
+    return out
+
+
+class DeferReload(Exception):
+    """There is nothing yet to validate the candidate on."""
+
+
+class Reloader:
+    def __init__(self, build, install, current, sample_path=None, sample_rows=1000, min_sample=200,
+                 min_agreement=0.9, prewarm=1000):
+        self.build = build
+        self.install = install
+        self.current = current
+        self.sample_path = sample_path
+        self.sample_rows = sample_rows
+        self.min_sample = min_sample
+        self.min_agreement = min_agreement
+        self.prewarm = prewarm
+        self._lock = threading.Lock()
+        self._thread = None
+        # a deferred candidate is kept so the retries don't load the same file again
+        self._pending = None
+        self.status = {'state': 'idle'}
+
+    def _sample(self, candidate, active):
+        if self.sample_path:
+            X = load_feature_rows(self.sample_path, candidate.features)[:self.sample_rows]
+            return X, candidate.features
+        if active.cache is not None:
+            X = active.cache.recent_rows(self.sample_rows, len(active.features))
+            if len(X) >= self.min_sample:
+                return X, active.features
+        return None
+
+    def validate(self, candidate, active):
+        """Agreement with the serving model on the sample; raises when the candidate is unfit to serve."""
+        if candidate.engine is None:
+            raise ValueError('model did not load')
+        sample = self._sample(candidate, active)
+        if sample is None:
+            if active.engine is not None:
+                raise DeferReload('no validation sample: set RELOAD_VALIDATION_FROM or wait for '
+                                  f'{self.min_sample} distinct cached vectors')
+            # nothing serves yet, so there is nothing to lose by installing it
+            return None, 0
+        X, features = sample
+        predicted = np.asarray(candidate.engine.predict(reorder(X, features, candidate.features)))
+        classes = getattr(candidate.engine, 'classes_', None)
+        if classes is not None and not np.isin(predicted, classes).all():
+            raise ValueError('predicted classes outside the model classes')
+        if active.engine is None:
+            return None, len(X)
+        served = np.asarray(active.engine.predict(reorder(X, features, active.features)))
+        agreement = float(np.mean(predicted == served))
+        if agreement < self.min_agreement:
+            raise ValueError(f'agrees with the serving model on {agreement:.1%} of {len(X)} sample rows, '
+                             f'needs {self.min_agreement:.1%}')
+        return agreement, len(X)
+
+    def warm(self, candidate, active):
+        if not self.prewarm or candidate.cache is None or active.cache is None:
+            return 0
+        X = active.cache.recent_rows(self.prewarm, len(active.features))
+        return candidate.cache.warm(reorder(X, active.features, candidate.features)) if len(X) else 0
+
+    def reload(self, path, wait=False):
+        """Load, check and install the model at path in a background thread; False if one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self.status = {'state': 'loading', 'path': path, 'started': time.time()}
+            self._thread = threading.Thread(target=self._run, args=(path,), daemon=True)
+            self._thread.start()
+        if wait:
+            self._thread.join()
+        return True
+
+    def _run(self, path):
+        start = time.perf_counter()
+        status = {'path': path, 'started': self.status['started']}
+        try:
+            active = self.current()
+            pending, self._pending = self._pending, None
+            if pending is not None and pending.path == path and pending.signature == file_signature(path):
+                candidate = pending
+            else:
+                candidate = self.build(path)
+            status['agreement'], status['sample_rows'] = self.validate(candidate, active)
+            status['warmed'] = self.warm(candidate, active)
+            self.install(candidate)
+            status['state'] = 'installed'
+            log.info('model reloaded', extra={'fields': {**status, **candidate.describe()}})
+        except DeferReload as e:
+            self._pending = candidate
+            status['state'] = 'deferred'
+            status['error'] = str(e)
+            log.warning(f'model reload deferred: {e}', extra={'fields': {'path': path}})
+        except Exception as e:
+            status['state'] = 'rejected'
+            status['error'] = str(e)
+            log.error(f'model reload rejected: {e}', extra={'fields': {'path': path}})
+        status['seconds'] = round(time.perf_counter() - start, 3)
+        status['finished'] = time.time()
+        self.status = status
+
+
+class ModelWatcher:
+    """Reloads when the file at path() changes; one polling thread per process, started on first use."""
+
+    def __init__(self, reloader, path, interval=5.0):
+        self.reloader = reloader
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._attempted = None
+
+    def ensure_started(self):
+        # threads don't survive fork, so each gunicorn worker watches for itself
+        if self.interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run, daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            path = self.path()
+            signature = file_signature(path)
+            # a rejected file isn't retried until it changes again, a deferred one is
+            if signature is None or signature in (self.reloader.current().signature, self._attempted):
+                continue
+            if self.reloader.reload(path, wait=True) and self.reloader.status['state'] != 'deferred':
+                self._attempted = signature
@@ -0,0 +1,233 @@
+"""Incremental retraining of the served forest from newly labeled rows.
+
+Labeled rows (user-confirmed reports through POST /feedback, or CSVs of
+reviewed verdicts) are appended to a LabelStore. An update then only
+looks at the rows added since the last published version:
+
+  - warm (default): keeps the current trees and grows `--trees` new ones
+    with warm_start on the new rows plus a replayed sample of older rows
+    the same size (at least `--min-replay`), so the new trees see both
+    classes and don't forget the history. Past `--max-trees` (by default
+    the first version's size plus one update) the oldest trees are
+    dropped, so scoring time and artifact size stay flat across updates
+  - refit: fits a fresh forest on the newest `--window` rows only
+
+Neither publishes a forest whose training rows miss a class the current
+forest predicts; a handful of confirmed reports is usually all phishing.
+
+Either way the cost follows the new data, not the store size. Each update
+is published as a numbered version in the output directory: the .forest
+artifact the server loads, the pickle the next warm start continues from
+and an entry in manifest.json. --serve copies the artifact over the
+server's model file, and the server validates and hot-swaps it
+(hot_reload.py):
+
+    python incremental.py init --data REAL_DATASET_FINAL.csv --store labeled.rows --out versions
+    python incremental.py append --store labeled.rows --data reviewed.csv
+    python incremental.py update --store labeled.rows --out versions --serve random_forest_model.forest
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from dataset import DATASET
+from label_store import LabelStore
+
+MANIFEST = 'manifest.json'
+
+
+def read_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {'versions': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _frame(X, features):
+    import pandas as pd
+    # fitted from a DataFrame so the artifact keeps the feature names the server orders rows by
+    return pd.DataFrame(X, columns=features)
+
+
+def publish(model, out_dir, entry, serve_path=None):
+    """Write version entry['version'] (artifact, pickle, manifest entry) and optionally serve it."""
+    import joblib
+    from training import export_forest
+
+    os.makedirs(out_dir, exist_ok=True)
+    name = f"forest-v{entry['version']:04d}"
+    entry = {**entry, 'artifact': f'{name}.forest', 'pickle': f'{name}.pkl',
+             'n_estimators': len(model.estimators_), 'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    joblib.dump(model, os.path.join(out_dir, entry['pickle']))
+    export_forest(model, os.path.join(out_dir, entry['artifact']),
+                  **{k: v for k, v in entry.items() if k not in ('artifact', 'pickle', 'created')})
+
+    manifest = read_manifest(out_dir)
+    manifest['versions'].append(entry)
+    tmp_path = os.path.join(out_dir, f'{MANIFEST}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST))
+
+    if serve_path:
+        # copy then rename, so the server never maps a half-written file
+        shutil.copyfile(os.path.join(out_dir, entry['artifact']), f'{serve_path}.tmp')
+        os.replace(f'{serve_path}.tmp', serve_path)
+    return entry
+
+
+def init(store_path, out_dir, data=DATASET, base=None, serve_path=None):
+    """Seed the store with the dataset and publish version 1 (the given pickle, or a forest fit on all of it)."""
+    from training import SERVED_DROP, load_xy, train_random_forest
+
+    X, y = load_xy(data, drop=SERVED_DROP)
+    store = LabelStore(store_path, list(X.columns))
+    if len(store):
+        raise ValueError(f'{store_path} already holds {len(store)} rows')
+    store.append(X.to_numpy(dtype=np.float64), y.to_numpy())
+    if base:
+        import joblib
+        model = joblib.load(base)
+    else:
+        model = train_random_forest(X, y)
+    return publish(model, out_dir, {'version': 1, 'base_version': None, 'mode': 'full',
+                                    'rows_new': len(store), 'rows_total': len(store),
+                                    'trained_rows': len(store)}, serve_path)
+
+
+def check_classes(forest, y, hint):
+    missing = sorted(set(np.asarray(forest.classes_).tolist()) - set(np.unique(y).tolist()))
+    if missing:
+        raise ValueError(f'the update rows have no class {missing} the current forest predicts; {hint}')
+
+
+def warm_update(forest, X, y, trees=10, max_trees=None, seed=0):
+    """The forest with `trees` more trees grown on (X, y); the oldest go first past max_trees."""
+    check_classes(forest, y, 'replay more older rows alongside them')
+    if max_trees is not None and len(forest.estimators_) + trees > max_trees:
+        forest.estimators_ = forest.estimators_[len(forest.estimators_) + trees - max_trees:]
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + trees, oob_score=False,
+                      random_state=seed)
+    return forest.fit(X, y)
+
+
+def refit(forest, X, y, seed=0):
+    """A fresh forest with the same parameters, fitted on (X, y) only."""
+    from sklearn.base import clone
+    check_classes(forest, y, 'pass a larger --window')
+    return clone(forest).set_params(warm_start=False, random_state=seed).fit(X, y)
+
+
+def update(store_path, out_dir, mode='warm', trees=10, max_trees=None, replay=1.0, min_replay=200, window=None,
+           serve_path=None):
+    """Train on the rows added since the last version and publish the next one; None when nothing is new.
+
+    max_trees defaults to the size of version 1 plus `trees`.
+    """
+    import joblib
+
+    store = LabelStore(store_path)
+    versions = read_manifest(out_dir)['versions']
+    if not versions:
+        raise ValueError(f'{out_dir} has no published version yet, run init first')
+    latest = versions[-1]
+    trained, total = latest['trained_rows'], len(store)
+    if total <= trained:
+        return None
+
+    version = latest['version'] + 1
+    if max_trees is None:
+        max_trees = versions[0]['n_estimators'] + trees
+    forest = joblib.load(os.path.join(out_dir, latest['pickle']))
+    start = time.perf_counter()
+    X_new, y_new = store.read(trained, total)
+    # how the serving model does on the new labels before it sees them
+    accuracy_before = float(np.mean(forest.predict(_frame(X_new, store.features)) == y_new))
+
+    if mode == 'warm':
+        rng = np.random.default_rng(version)
+        # a handful of confirmed reports is often a single class, so always replay some history
+        n_replay = min(trained, max(int(replay * len(X_new)), min_replay))
+        index = np.sort(rng.choice(trained, size=n_replay, replace=False)) if n_replay else []
+        X_old, y_old = store.read(index=index)
+        X_fit, y_fit = np.concatenate([X_new, X_old]), np.concatenate([y_new, y_old])
+        model = warm_update(forest, _frame(X_fit, store.features), y_fit, trees, max_trees, seed=version)
+    elif mode == 'refit':
+        window = window or (total - trained)
+        X_fit, y_fit = store.read(max(0, total - window), total)
+        model = refit(forest, _frame(X_fit, store.features), y_fit, seed=version)
+    else:
+        raise ValueError(f'unknown mode {mode}')
+
+    return publish(model, out_dir, {
+        'version': version,
+        'base_version': latest['version'],
+        'mode': mode,
+        'rows_new': total - trained,
+        'rows_fit': len(X_fit),
+        'rows_total': total,
+        'trained_rows': total,
+        'accuracy_before_on_new': accuracy_before,
+        'train_seconds': round(time.perf_counter() - start, 3),
+    }, serve_path)
+
+
+def append_csv(store_path, data):
+    """Append the labeled rows of a CSV/parquet with the store's feature columns and a status column."""
+    from dataset import encode_status, load_dataset
+
+    store = LabelStore(store_path)
+    df = encode_status(load_dataset(data, columns=store.features + ['status']))
+    return store.append(df[store.features].to_numpy(dtype=np.float64), df['status'].to_numpy())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Incremental retraining from labeled rows')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('init', help='seed the store with the dataset and publish version 1')
+    p.add_argument('--data', default=DATASET)
+    p.add_argument('--store', default='labeled.rows')
+    p.add_argument('--out', default='versions')
+    p.add_argument('--base', help='fitted forest pickle to start from (default: fit one on the whole dataset)')
+    p.add_argument('--serve', metavar='PATH', help='also copy the artifact to the server model path')
+
+    p = commands.add_parser('append', help='append the labeled rows of a CSV/parquet file')
+    p.add_argument('--data', required=True)
+    p.add_argument('--store', default='labeled.rows')
+
+    p = commands.add_parser('update', help='train on the rows added since the last version')
+    p.add_argument('--store', default='labeled.rows')
+    p.add_argument('--out', default='versions')
+    p.add_argument('--mode', choices=['warm', 'refit'], default='warm')
+    p.add_argument('--trees', type=int, default=10, help='trees added per warm update')
+    p.add_argument('--max-trees', type=int, help='drop the oldest trees beyond this many (default: version 1 size plus --trees)')
+    p.add_argument('--replay', type=float, default=1.0, help='older rows replayed per new row in a warm update')
+    p.add_argument('--min-replay', type=int, default=200, help='fewest older rows replayed in a warm update')
+    p.add_argument('--window', type=int, help='rows a refit trains on (default: the new rows)')
+    p.add_argument('--serve', metavar='PATH', help='also copy the artifact to the server model path')
+    args = parser.parse_args()
+
+    if args.command == 'init':
+        entry = init(args.store, args.out, args.data, args.base, args.serve)
+        print(f"Version {entry['version']}: {entry['n_estimators']} trees on {entry['rows_total']} rows")
+    elif args.command == 'append':
+        print(f"{args.store} holds {append_csv(args.store, args.data)} rows")
+    else:
+        try:
+            entry = update(args.store, args.out, args.mode, args.trees, args.max_trees, args.replay,
+                           args.min_replay, args.window, args.serve)
+        except ValueError as e:
+            raise SystemExit(f"Not published: {e}")
+        if entry is None:
+            print("No new rows since the last version")
+        else:
+            print(f"Version {entry['version']} ({entry['mode']}): {entry['rows_new']} new rows, "
+                  f"{entry['n_estimators']} trees, accuracy on them before {entry['accuracy_before_on_new']:.4f}, "
+                  f"{entry['train_seconds']:.2f} s")
@@ -0,0 +1,112 @@
+"""Append-only store of labeled feature rows for incremental retraining.
+
+Every feature is -1, 0 or 1, so a row is stored as one int8 per feature
+plus an int8 label (1 = legitimate, 0 = phishing, as in training), with
+-128 for a missing feature. Rows are fixed-size records in one data file
+next to a small JSON file with the feature order:
+
+    labeled.rows        records, appended with a single write each
+    labeled.rows.json   {"features": [...], "created": ...}
+
+Appends never rewrite anything, so several server processes can add
+rows to the same store. Readers memory-map the data file and decode only
+the rows they ask for, which keeps a retrain on the newest rows
+independent of how much history the store holds.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; appends there are only serialized within the process
+    fcntl = None
+
+MISSING = -128
+LABELS = {'legitimate': 1, 'legit': 1, 'phishing': 0, 'malicious': 0}
+
+
+def encode_label(label):
+    """1/0 training label from 1/0 or a label name."""
+    if isinstance(label, str):
+        if label.lower() not in LABELS:
+            raise ValueError(f"label must be one of {', '.join(LABELS)} or 1/0")
+        return LABELS[label.lower()]
+    if label in (0, 1) and not isinstance(label, bool):
+        return int(label)
+    raise ValueError(f"label must be one of {', '.join(LABELS)} or 1/0")
+
+
+class LabelStore:
+    def __init__(self, path, features=None):
+        self.path = path
+        self.meta_path = f'{path}.json'
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            if features is not None and list(features) != meta['features']:
+                raise ValueError(f'{path} stores a different feature order')
+        elif features is not None:
+            meta = {'features': list(features), 'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            with open(f'{self.meta_path}.tmp', 'w') as f:
+                json.dump(meta, f, indent=2)
+            os.replace(f'{self.meta_path}.tmp', self.meta_path)
+        else:
+            raise FileNotFoundError(f'{self.meta_path} does not exist and no feature order was given')
+        self.features = meta['features']
+        self.record_size = len(self.features) + 1
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path) // self.record_size
+        except OSError:
+            return 0
+
+    def encode(self, X, y):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.features))
+        y = np.asarray([encode_label(label) for label in np.atleast_1d(y)], dtype=np.int8)
+        if len(y) != len(X):
+            raise ValueError(f'{len(X)} rows but {len(y)} labels')
+        present = ~np.isnan(X)
+        if not np.isin(X[present], (-1, 0, 1)).all():
+            raise ValueError('feature values must be -1, 0 or 1')
+        records = np.empty((len(X), self.record_size), dtype=np.int8)
+        records[:, :-1] = np.where(present, np.nan_to_num(X), MISSING)
+        records[:, -1] = y
+        return records
+
+    def append(self, X, y):
+        """Add labeled rows; returns the store size afterwards."""
+        data = self.encode(X, y).tobytes()
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                # a write cut short by a crash would shift every later record
+                size = os.fstat(fd).st_size
+                if size % self.record_size:
+                    os.ftruncate(fd, size - size % self.record_size)
+                os.write(fd, data)
+                return os.fstat(fd).st_size // self.record_size
+            finally:
+                os.close(fd)
+
+    def records(self):
+        n = len(self)
+        if not n:
+            return np.empty((0, self.record_size), dtype=np.int8)
+        return np.memmap(self.path, dtype=np.int8, mode='r', shape=(n, self.record_size))
+
+    def read(self, start=0, stop=None, index=None):
+        """(X float32 with NaN for missing, y) for rows start:stop, or for the row numbers in index."""
+        records = self.records()
+        rows = np.asarray(records[index] if index is not None else records[start:stop])
+        X = rows[:, :-1].astype(np.float32)
+        X[rows[:, :-1] == MISSING] = np.nan
+        return X, rows[:, -1].astype(np.int64)
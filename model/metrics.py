@@ -0,0 +1,236 @@
+"""Small in-process metrics registry rendered in the Prometheus text format.
+
+Just counters and histograms with labels, plus gauges read from a callback
+at scrape time; enough for /metrics without pulling in prometheus_client.
+
+Under gunicorn every worker has its own registry. Given a directory, each
+worker also writes a snapshot of its values there (every `flush_interval`
+seconds, and whenever it answers a scrape) and render() merges them all:
+counters and histograms are summed over every worker that ever ran, so
+they don't go backwards when another worker answers or one is replaced,
+and gauges are reported per live worker with a `worker` label. A scrape
+sees the other workers' values as of their last flush.
+"""
+
+import bisect
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, doc, labels=()):
+        self.name, self.doc, self.label_names = name, doc, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def render(self, values=None):
+        values = self.snapshot() if values is None else values
+        lines = [f'# HELP {self.name} {self.doc}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(values.items()):
+            lines.append(f'{self.name}{_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, doc, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.doc, self.label_names = name, doc, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (last slot is +Inf), sum, count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: [list(counts), total, count] for labels, (counts, total, count) in self._series.items()}
+
+    @staticmethod
+    def merge(a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]]
+
+    def render(self, values=None):
+        values = self.snapshot() if values is None else values
+        lines = [f'# HELP {self.name} {self.doc}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets + ('+Inf',), counts):
+                cumulative += c
+                bucket_labels = _labels(self.label_names + ('le',), labels + (bound,))
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            series_labels = _labels(self.label_names, labels)
+            lines.append(f'{self.name}_sum{series_labels} {total}')
+            lines.append(f'{self.name}_count{series_labels} {count}')
+        return lines
+
+
+class Gauge:
+    """Value(s) read at scrape time; fn returns a number or a {label_values: number} dict."""
+
+    def __init__(self, name, doc, fn, labels=()):
+        self.name, self.doc, self.fn, self.label_names = name, doc, fn, tuple(labels)
+
+    def snapshot(self):
+        value = self.fn()
+        if value is None:
+            return {}
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        return {labels if isinstance(labels, tuple) else (labels,): v for labels, v in items}
+
+    def render(self, values=None, label_names=None):
+        values = self.snapshot() if values is None else values
+        if not values:
+            return []
+        label_names = self.label_names if label_names is None else label_names
+        lines = [f'# HELP {self.name} {self.doc}', f'# TYPE {self.name} gauge']
+        for labels, v in values.items():
+            lines.append(f'{self.name}{_labels(label_names, labels)} {v}')
+        return lines
+
+
+class Registry:
+    def __init__(self, directory=None, flush_interval=1.0):
+        self._metrics = []
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._snapshot_path = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def ensure_flushing(self):
+        """Start this process's flush thread; threads don't survive fork, so each worker calls it itself."""
+        if self.directory is None or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # pid and start time, so a reused pid doesn't overwrite a dead worker's totals
+                self._snapshot_path = os.path.join(self.directory, f'{os.getpid()}-{time.time_ns()}.json')
+                threading.Thread(target=self._flush_loop, daemon=True).start()
+                self._pid = os.getpid()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to its snapshot file."""
+        if self._snapshot_path is None:
+            return
+        data = {'pid': os.getpid(), 'metrics': {
+            metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+            for metric in self._metrics}}
+        tmp_path = f'{self._snapshot_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._snapshot_path)
+
+    def _snapshots(self):
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            yield data['pid'], {name: {tuple(labels): value for labels, value in values}
+                                for name, values in data['metrics'].items()}
+
+    @staticmethod
+    def _alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def render(self):
+        lines = []
+        if self.directory is None:
+            for metric in self._metrics:
+                lines.extend(metric.render())
+            return '\n'.join(lines) + '\n'
+
+        self.ensure_flushing()
+        self.flush()
+        snapshots = list(self._snapshots())
+        for metric in self._metrics:
+            if isinstance(metric, Gauge):
+                values = {(pid, *labels): value for pid, snapshot in snapshots if self._alive(pid)
+                          for labels, value in snapshot.get(metric.name, {}).items()}
+                lines.extend(metric.render(values, ('worker',) + metric.label_names))
+                continue
+            values = {}
+            for _, snapshot in snapshots:
+                for labels, value in snapshot.get(metric.name, {}).items():
+                    values[labels] = metric.merge(values[labels], value) if labels in values else value
+            lines.extend(metric.render(values))
+        return '\n'.join(lines) + '\n'
+
+
+def rss_mb(pid=None):
+    """Current RSS of pid (this process when None), from /proc when available."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid is None:
+        import resource
+        # ru_maxrss is KB on Linux, bytes on macOS; this is the peak, not current
+        scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    return None
@@ -0,0 +1,100 @@
+"""Dynamic batching for single-row predictions.
+
+Request threads hand their feature row to a MicroBatcher and block on a
+Future. One background thread collects rows for up to `window_ms` (or until
+`max_batch` rows are waiting), scores them with a single predict call and
+hands each caller its own result back.
+
+A row can name the model it was built for; a batch is then split by model,
+so a row never reaches a model with another feature order even when the
+server swaps models while the batch is filling.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn=None, max_batch=256, window_ms=2.0, on_batch=None):
+        self.predict_fn = predict_fn
+        self.on_batch = on_batch
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_worker(self):
+        # threads don't survive fork, so each gunicorn worker starts its own on first use
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, row, model=None):
+        """Future for the prediction of row by model.predict, or by predict_fn when model is None."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.array(row, dtype=np.float32).reshape(-1), model, future))
+        return future
+
+    def predict(self, row, model=None, timeout=None):
+        return self.submit(row, model).result(timeout)
+
+    def _collect(self, q):
+        items = [q.get()]
+        deadline = time.monotonic() + self.window
+        while len(items) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        q = self._queue
+        while True:
+            groups = {}
+            for row, model, future in self._collect(q):
+                groups.setdefault(id(model), (model, [], []))
+                groups[id(model)][1].append(row)
+                groups[id(model)][2].append(future)
+            for model, rows, futures in groups.values():
+                self._score(model, rows, futures)
+
+    def _score(self, model, rows, futures):
+        try:
+            predict = self.predict_fn if model is None else model.predict
+            results = predict(np.stack(rows))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(rows)
+        if self.on_batch is not None:
+            self.on_batch(len(rows))
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+            'window_ms': self.window * 1000.0,
+            'max_batch': self.max_batch,
+        }
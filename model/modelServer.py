@@ -1,41 +1,419 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import joblib
-import pandas as pd
+import numpy as np
+import hmac
 import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import warnings
+
+from forest_artifact import load_artifact
+from external_features import BackgroundResolver, FeatureResolver, default_sources
+from forest_engine import CompiledForest, compile_model
+from hot_reload import ModelWatcher, Reloader, ServingModel, file_signature
+from label_store import LabelStore
+from metrics import SIZE_BUCKETS, Registry, rss_mb
+from micro_batcher import MicroBatcher
+from shadow import ShadowRunner
+from single_flight import SingleFlight
+from ternary_cache import MemoPredictor, load_feature_rows
+from verdict_cache import VerdictCache
 
 app = Flask(__name__)
-CORS(app)
-
-try:
-    model = joblib.load("./random_forest_model.pkl")
-    print("Model loaded successfully")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    model = None
-
-def predict_url(model, feature_dict):
-    required_features = [
-        'having_IP_Address', 'URL_Length', 'Shortining_Service',
-        'having_At_Symbol', 'double_slash_redirecting', 'Prefix_Suffix',
-        'having_Sub_Domain', 'Domain_Registeration_Length', 'Favicon',
-        'Port', 'HTTPS_token', 'Request_URL', 'Anchor_URL',
-        'Links_in_Tags', 'Abnormal_URL', 'Domain_age', 'DNS_record',
-        'Website_traffic', 'Page_rank', 'Google_Index'
+# browsers only let the extension's pages call the server; CORS_ORIGINS (comma-separated) narrows it
+# to the installed extension id, e.g. chrome-extension://<id>
+CORS_ORIGINS = [origin.strip() for origin in os.environ.get('CORS_ORIGINS', '').split(',') if origin.strip()] or [
+    r'^chrome-extension://[a-p]{32}$', r'^moz-extension://[0-9a-f-]+$']
+CORS(app, origins=CORS_ORIGINS)
+
+# MODEL_SERVER_DEBUG=1 logs every request's payload/feature row/response at DEBUG level
+DEBUG_LOGGING = os.environ.get('MODEL_SERVER_DEBUG', '0') == '1'
+LOG_LEVEL = 'DEBUG' if DEBUG_LOGGING else os.environ.get('LOG_LEVEL', 'INFO')
+# fraction of per-request log events that are written; startup messages and errors always are
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1' if DEBUG_LOGGING else '0.01'))
+# directory the worker processes share their metrics through, so /metrics adds them all up
+# (gunicorn.conf.py sets one); unset, /metrics shows this process only
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '1'))
+
+# large batch payloads are scored this many rows at a time so memory stays bounded
+BATCH_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', '1024'))
+
+# 'compiled' walks the forest from flat node arrays (forest_engine.py), 'sklearn' calls the pickled model as-is
+MODEL_ENGINE = os.environ.get('MODEL_ENGINE', 'compiled')
+
+# memoize predictions by packed feature vector; 0 turns the cache off
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '65536'))
+# optional CSV (e.g. REAL_DATASET_FINAL.csv) whose feature vectors are scored once at startup
+PRECOMPUTE_CACHE_FROM = os.environ.get('PRECOMPUTE_CACHE_FROM')
+
+DEFAULT_FEATURES = [
+    'having_IP_Address', 'URL_Length', 'Shortining_Service',
+    'having_At_Symbol', 'double_slash_redirecting', 'Prefix_Suffix',
+    'having_Sub_Domain', 'Domain_Registeration_Length', 'Favicon',
+    'Port', 'HTTPS_token', 'Request_URL', 'Anchor_URL',
+    'Links_in_Tags', 'Abnormal_URL', 'Domain_age', 'DNS_record',
+    'Website_traffic', 'Page_rank', 'Google_Index'
+]
+
+# we pass plain arrays to a model fitted on a DataFrame, the column order is handled by required_features
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+# /predict rows are pooled for up to this many ms and scored together; 0 scores each request on its own
+MICRO_BATCH_WINDOW_MS = float(os.environ.get('MICRO_BATCH_WINDOW_MS', '0'))
+MICRO_BATCH_MAX_ITEMS = int(os.environ.get('MICRO_BATCH_MAX_ITEMS', '256'))
+
+# 'class' answers /predict with model.predict; 'proba' adds the predict_proba confidence and
+# 'early' stops walking trees once the outcome is settled (compiled engine only). ?mode= overrides it
+SCORING_MODE = os.environ.get('SCORING_MODE', 'class')
+SCORING_MODES = ('class', 'proba', 'early')
+# 'early' also stops once the top class's mean probability reaches this, if set
+EARLY_EXIT_CONFIDENCE = float(os.environ['EARLY_EXIT_CONFIDENCE']) if os.environ.get('EARLY_EXIT_CONFIDENCE') else None
+EARLY_EXIT_BLOCK = int(os.environ.get('EARLY_EXIT_BLOCK', '10'))
+
+# /features/external answers are cached per registered domain; failed lookups for a shorter time
+RESOLVER_TTL = float(os.environ.get('RESOLVER_TTL', '3600'))
+RESOLVER_ERROR_TTL = float(os.environ.get('RESOLVER_ERROR_TTL', '60'))
+RESOLVER_TIMEOUT = float(os.environ.get('RESOLVER_TIMEOUT', '10'))
+# lookups each source (whois, page rank, ...) runs at once per worker
+RESOLVER_CONCURRENCY = int(os.environ.get('RESOLVER_CONCURRENCY', '8'))
+
+# verdicts for URLs sent with /predict are answered from GET /verdict until their TTL runs out;
+# phishing/malicious verdicts expire sooner so a cleaned-up site isn't flagged for long
+VERDICT_CACHE_SIZE = int(os.environ.get('VERDICT_CACHE_SIZE', '100000'))
+VERDICT_TTL_LEGIT = float(os.environ.get('VERDICT_TTL_LEGIT', '86400'))
+VERDICT_TTL_SUSPICIOUS = float(os.environ.get('VERDICT_TTL_SUSPICIOUS', '900'))
+VERDICT_CACHE_BY_DOMAIN = os.environ.get('VERDICT_CACHE_BY_DOMAIN', '0') == '1'
+# optional SQLite file so the verdict cache survives restarts; under gunicorn it is also what
+# carries a purge to the other workers' in-memory caches, without it a purge reaches one worker
+VERDICT_CACHE_PATH = os.environ.get('VERDICT_CACHE_PATH')
+# /admin/* and /features/external require it in the X-Admin-Token header, and are refused while it is unset
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+# /predict only caches a verdict for its url when the request carries this in X-Verdict-Token;
+# the features come from the client, so an unauthenticated write could plant a 'legit' verdict
+VERDICT_WRITE_TOKEN = os.environ.get('VERDICT_WRITE_TOKEN')
+# candidate models scored next to the primary off the request path, e.g.
+# SHADOW_MODELS=compact=random_forest_model.compact.forest,tree=decision_tree.pkl
+SHADOW_MODELS = os.environ.get('SHADOW_MODELS', '')
+SHADOW_WORKERS = int(os.environ.get('SHADOW_WORKERS', '2'))
+# shadow work beyond this many queued requests is dropped, never waited for
+SHADOW_QUEUE_SIZE = int(os.environ.get('SHADOW_QUEUE_SIZE', '1000'))
+# seconds between checks of the serving model file for a new artifact, 0 to only reload through POST /admin/reload
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', '5'))
+# held-out CSV a new model is checked on before it serves (default: the vectors the cache served recently,
+# once there are RELOAD_MIN_SAMPLE of them; until then a swap is deferred)
+RELOAD_VALIDATION_FROM = os.environ.get('RELOAD_VALIDATION_FROM')
+RELOAD_VALIDATION_ROWS = int(os.environ.get('RELOAD_VALIDATION_ROWS', '1000'))
+RELOAD_MIN_SAMPLE = int(os.environ.get('RELOAD_MIN_SAMPLE', '200'))
+RELOAD_MIN_AGREEMENT = float(os.environ.get('RELOAD_MIN_AGREEMENT', '0.9'))
+# recent cache entries scored by the new model before the swap
+RELOAD_PREWARM = int(os.environ.get('RELOAD_PREWARM', '1000'))
+# LabelStore that POST /feedback appends confirmed labels to, for incremental.py update
+FEEDBACK_STORE = os.environ.get('FEEDBACK_STORE')
+# concurrent /predict requests for the same feature vector share one model call
+SINGLE_FLIGHT = os.environ.get('SINGLE_FLIGHT', '1') == '1'
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+log = logging.getLogger('modelServer')
+_handler = logging.StreamHandler()
+_handler.setFormatter(JsonFormatter())
+log.addHandler(_handler)
+log.setLevel(LOG_LEVEL)
+log.propagate = False
+
+def log_sampled(level, msg, **fields):
+    if log.isEnabledFor(level) and random.random() < LOG_SAMPLE_RATE:
+        log.log(level, msg, extra={'fields': fields})
+
+registry = Registry(METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL)
+REQUESTS = registry.counter('phish_requests_total', 'Requests by endpoint and outcome', labels=('endpoint', 'outcome'))
+STAGE_SECONDS = registry.histogram('phish_stage_seconds', 'Time spent in each stage of a request',
+                                   labels=('endpoint', 'stage'))
+BATCH_SIZE = registry.histogram('phish_batch_size', 'Rows scored per model call', labels=('source',),
+                                buckets=SIZE_BUCKETS)
+TREES_EVALUATED = registry.histogram('phish_trees_evaluated', 'Trees walked per /predict row in the early-exit mode',
+                                     buckets=SIZE_BUCKETS)
+PREDICTIONS = registry.counter('phish_predictions_total', 'Predictions by class', labels=('message',))
+registry.gauge('phish_prediction_cache', 'Prediction cache counters and sizes',
+               lambda: None if prediction_cache is None else {
+                   k: v for k, v in prediction_cache.stats().items() if k != 'lru_maxsize'
+               }, labels=('counter',))
+registry.gauge('phish_verdict_cache', 'Verdict cache counters and size',
+               lambda: None if verdicts is None else {
+                   k: v for k, v in verdicts.stats().items() if k != 'maxsize'
+               }, labels=('counter',))
+registry.gauge('phish_resolver', 'External feature resolver counters',
+               lambda: {k: v for k, v in resolver.stats().items() if k != 'sources'}, labels=('counter',))
+registry.gauge('phish_single_flight', 'Identical concurrent /predict rows coalesced into one model call',
+               lambda: None if coalescer is None else coalescer.stats(), labels=('counter',))
+registry.gauge('phish_shadow_disagreement_rate', 'Share of shadow predictions that differ from the primary',
+               lambda: None if shadows is None else {
+                   name: counts['disagreement_rate'] for name, counts in shadows.stats()['models'].items()
+               }, labels=('model',))
+
+# reloaded in place when the file changes (hot_reload.py). A .forest artifact
+# (forest_artifact.py) is memory-mapped and preferred over the pickle when present
+MODEL_PATH = os.environ.get('MODEL_PATH') or (
+    './random_forest_model.forest' if os.path.exists('./random_forest_model.forest')
+    else './random_forest_model.pkl'
+)
+
+def feature_order(model):
+    # use the column order the model was fitted with when it was saved from a DataFrame
+    names = getattr(model, 'feature_names_in_', None)
+    return [str(name) for name in names] if names is not None else list(DEFAULT_FEATURES)
+
+def build_model(path):
+    """Load the model at path into a ServingModel without touching what is serving now."""
+    signature = file_signature(path)
+    start = time.perf_counter()
+    if path.endswith('.forest'):
+        loaded = load_artifact(path)
+    else:
+        # unpickling pulls in sklearn (and scipy); the .forest artifact needs only numpy
+        import joblib
+        loaded = joblib.load(path)
+    log.info("Model loaded successfully",
+             extra={'fields': {'path': path, 'seconds': round(time.perf_counter() - start, 3)}})
+
+    # the unpickled estimator is kept around even when the compiled engine is serving
+    engine = loaded
+    if MODEL_ENGINE == 'compiled' and not isinstance(loaded, CompiledForest):
+        engine = compile_model(loaded) or loaded
+    log.info(f"Serving with {type(engine).__name__}")
+
+    features = feature_order(engine)
+
+    cache = None
+    serving = engine
+    if PREDICTION_CACHE_SIZE > 0 and hasattr(engine, 'predict_proba'):
+        cache = MemoPredictor(engine, maxsize=PREDICTION_CACHE_SIZE)
+        if PRECOMPUTE_CACHE_FROM:
+            try:
+                count = cache.precompute(load_feature_rows(PRECOMPUTE_CACHE_FROM, features))
+                log.info(f"Precomputed {count} feature vectors from {PRECOMPUTE_CACHE_FROM}")
+            except Exception as e:
+                log.error(f"Error precomputing cache: {e}")
+        serving = cache
+    return ServingModel(path, loaded, engine, serving, features, cache, signature)
+
+def install_model(candidate):
+    global current, model, sklearn_model, required_features, prediction_cache
+    # requests read `current` once, so this single assignment is the swap
+    current = candidate
+    sklearn_model, required_features, prediction_cache = candidate.loaded, candidate.features, candidate.cache
+    model = candidate.model
+
+def load_model(path=MODEL_PATH):
+    try:
+        candidate = build_model(path)
+    except Exception as e:
+        log.error(f"Error loading model: {e}", extra={'fields': {'path': path}})
+        if current is not None and current.model is not None:
+            # a half-written or broken file must not take down a model that is serving fine
+            return model
+        candidate = ServingModel(path, None, None, None, feature_order(None))
+    install_model(candidate)
+    return model
+
+current = None
+load_model()
+
+# what this process paid to start; heavy libraries only show up when the model needed them
+STARTUP = {
+    'model_path': MODEL_PATH,
+    'engine': type(getattr(model, 'model', model)).__name__,
+    'rss_mb': rss_mb(),
+    'heavy_modules': [name for name in ('pandas', 'sklearn', 'scipy', 'matplotlib', 'tensorflow') if name in sys.modules],
+}
+log.info('startup', extra={'fields': STARTUP})
+
+reloader = Reloader(build_model, install_model, lambda: current, sample_path=RELOAD_VALIDATION_FROM,
+                    sample_rows=RELOAD_VALIDATION_ROWS, min_sample=RELOAD_MIN_SAMPLE,
+                    min_agreement=RELOAD_MIN_AGREEMENT, prewarm=RELOAD_PREWARM)
+# watches whichever file is serving, so a reload from another path isn't undone
+watcher = ModelWatcher(reloader, lambda: current.path, interval=MODEL_RELOAD_INTERVAL)
+
+@app.before_request
+def start_watcher():
+    watcher.ensure_started()
+    registry.ensure_flushing()
+
+# every row is submitted with the model its request snapshotted, so a reload mid-batch
+# never scores a row built for one feature order with a model expecting another
+batcher = None
+if MICRO_BATCH_WINDOW_MS > 0:
+    batcher = MicroBatcher(max_batch=MICRO_BATCH_MAX_ITEMS,
+                           window_ms=MICRO_BATCH_WINDOW_MS,
+                           on_batch=lambda n: BATCH_SIZE.observe(n, 'micro_batch'))
+
+verdicts = None
+if VERDICT_CACHE_SIZE > 0:
+    verdicts = VerdictCache(
+        maxsize=VERDICT_CACHE_SIZE,
+        ttls={'legit': VERDICT_TTL_LEGIT, 'phishing': VERDICT_TTL_SUSPICIOUS, 'malicious': VERDICT_TTL_SUSPICIOUS},
+        by_domain=VERDICT_CACHE_BY_DOMAIN,
+        path=VERDICT_CACHE_PATH,
+    )
+
+coalescer = SingleFlight() if SINGLE_FLIGHT else None
+
+feedback = None
+if FEEDBACK_STORE and not ADMIN_TOKEN:
+    # the labels feed incremental.py update, so an open /feedback would let anyone poison the next model
+    log.error('FEEDBACK_STORE is set without ADMIN_TOKEN, /feedback stays disabled')
+elif FEEDBACK_STORE:
+    try:
+        feedback = LabelStore(FEEDBACK_STORE)
+    except FileNotFoundError:
+        feedback = LabelStore(FEEDBACK_STORE, current.features)
+
+shadows = ShadowRunner.from_spec(SHADOW_MODELS, feature_order, registry=registry,
+                                 workers=SHADOW_WORKERS, max_queue=SHADOW_QUEUE_SIZE)
+
+resolver = BackgroundResolver(FeatureResolver(default_sources(), ttl=RESOLVER_TTL, error_ttl=RESOLVER_ERROR_TTL,
+                                              concurrency=RESOLVER_CONCURRENCY))
+
+# one preallocated input row per thread so concurrent requests don't share a buffer
+_row_buffers = threading.local()
+
+def feature_vector(feature_dict, features):
+    row = getattr(_row_buffers, 'row', None)
+    if row is None or row.shape[1] != len(features):
+        row = np.empty((1, len(features)), dtype=np.float32)
+        _row_buffers.row = row
+    for i, name in enumerate(features):
+        # missing features become NaN, same as the old DataFrame(columns=...) path
+        row[0, i] = feature_dict.get(name, np.nan)
+    return row
+
+def predict_row(row, model):
+    if batcher is not None:
+        return int(batcher.predict(row, model))
+    BATCH_SIZE.observe(1, 'predict')
+    return int(model.predict(row)[0])
+
+def score_row(row, mode, model):
+    """(prediction, confidence, trees evaluated) for one feature row in the 'proba' or 'early' mode."""
+    BATCH_SIZE.observe(1, 'predict')
+    n_trees = getattr(model, 'n_estimators', None)
+    if mode == 'early' and hasattr(model, 'predict_proba_early'):
+        proba, used = model.predict_proba_early(row, EARLY_EXIT_BLOCK, EARLY_EXIT_CONFIDENCE)
+        n_trees = int(used[0])
+        TREES_EVALUATED.observe(n_trees)
+    else:
+        proba = model.predict_proba(row)
+    best = int(np.argmax(proba[0]))
+    return int(model.classes_[best]), float(proba[0, best]), n_trees
+
+def run_model(row, mode, model):
+    if mode == 'class':
+        return predict_row(row, model), None, None
+    return score_row(row, mode, model)
+
+def predict_url(active, feature_dict, mode='class'):
+    """(prediction, confidence, trees evaluated) for one feature dict, scored by the ServingModel active.
+
+    What /predict runs, so bench_serving.py's in-process target times the production path.
+    """
+    t0 = time.perf_counter()
+    row = feature_vector(feature_dict, active.features)
+    log_sampled(logging.DEBUG, 'feature row', features=feature_dict,
+                row=dict(zip(active.features, row[0].tolist())))
+    t1 = time.perf_counter()
+    if coalescer is not None:
+        # + 0.0 folds -0.0 into 0.0 so equal vectors get equal keys
+        key = (id(active.model), mode, (row + 0.0).tobytes())
+        result, _ = coalescer.do(key, lambda: run_model(row, mode, active.model))
+    else:
+        result = run_model(row, mode, active.model)
+    STAGE_SECONDS.observe(t1 - t0, 'predict', 'features')
+    STAGE_SECONDS.observe(time.perf_counter() - t1, 'predict', 'model')
+    return result
+
+def feature_row(feature_dict, features):
+    if isinstance(feature_dict, ValueError):
+        raise feature_dict
+    if not isinstance(feature_dict, dict):
+        raise ValueError('expected a JSON object of features')
+    missing = [name for name in features if name not in feature_dict]
+    if missing:
+        raise ValueError(f"missing features: {', '.join(missing)}")
+    return [float(feature_dict[name]) for name in features]
+
+def score_chunk(model, rows):
+    X = np.asarray(rows, dtype=np.float32)
+    if hasattr(model, 'predict_proba'):
+        proba = model.predict_proba(X)
+        best = proba.argmax(axis=1)
+        predictions = model.classes_[best]
+        confidences = proba[range(len(rows)), best]
+    else:
+        predictions = model.predict(X)
+        confidences = [None] * len(rows)
+    return [
+        (int(p), None if c is None else float(c))
+        for p, c in zip(predictions, confidences)
     ]
-    
-    print("\n=== Feature Dictionary ===")
-    print(json.dumps(feature_dict, indent=2))
-    print("======================\n")
-    
-    df = pd.DataFrame([feature_dict], columns=required_features)
-    
-    print("=== DataFrame ===")
-    print(df)
-    print("===============\n")
-    
-    prediction = model.predict(df)
-    return int(prediction[0])
+
+def predict_batch(model, feature_dicts, chunk_size=None, features=None):
+    # one predict call per chunk; bad items get an error slot instead of failing the whole batch
+    chunk_size = chunk_size or BATCH_CHUNK_SIZE
+    features = features or feature_order(model)
+    results = []
+    rows, slots = [], []
+
+    def flush():
+        BATCH_SIZE.observe(len(rows), 'batch')
+        for slot, (prediction, confidence) in zip(slots, score_chunk(model, rows)):
+            results[slot] = {
+                'prediction': prediction,
+                'message': get_prediction_message(prediction),
+                'confidence': confidence,
+                'error': None
+            }
+        rows.clear()
+        slots.clear()
+
+    for feature_dict in feature_dicts:
+        results.append(None)
+        try:
+            rows.append(feature_row(feature_dict, features))
+            slots.append(len(results) - 1)
+        except (ValueError, TypeError) as e:
+            results[-1] = {'prediction': None, 'message': None, 'confidence': None, 'error': str(e)}
+        if len(rows) >= chunk_size:
+            flush()
+    if rows:
+        flush()
+    return results
+
+def iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            # handed to predict_batch as-is so it lands in that item's error slot
+            yield ValueError(f'invalid JSON line: {e}')
 
 def get_prediction_message(prediction):
     if prediction == -1:
@@ -49,43 +427,267 @@ def get_prediction_message(prediction):
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    if model is None:
+    active = current
+    if active.model is None:
+        REQUESTS.inc('predict', 'model_unavailable')
         return jsonify({
             'success': False,
             'error': 'Model not loaded'
         }), 500
 
     try:
-        print("\n=== Received Request ===")
-        print("Content-Type:", request.headers.get('Content-Type'))
-        print("Request Data:", json.dumps(request.json, indent=2))
-        print("=====================\n")
-        
+        t0 = time.perf_counter()
         feature_dict = request.json
-        prediction = predict_url(model, feature_dict)
+        if not isinstance(feature_dict, dict):
+            raise ValueError('expected a JSON object of features')
+        mode = request.args.get('mode', SCORING_MODE)
+        if mode not in SCORING_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SCORING_MODES)}")
+        t1 = time.perf_counter()
+        prediction, confidence, trees_evaluated = predict_url(active, feature_dict, mode)
         message = get_prediction_message(prediction)
-        
+        t3 = time.perf_counter()
+
         response = {
             'success': True,
             'prediction': prediction,
             'message': message
         }
-        
-        print("=== Sending Response ===")
-        print(json.dumps(response, indent=2))
-        print("=====================\n")
-        
-        return jsonify(response)
-        
+        if mode != 'class':
+            response['confidence'] = confidence
+            response['trees_evaluated'] = trees_evaluated
+        result = jsonify(response)
+        t4 = time.perf_counter()
+
+        STAGE_SECONDS.observe(t1 - t0, 'predict', 'parse')
+        STAGE_SECONDS.observe(t4 - t3, 'predict', 'serialize')
+        REQUESTS.inc('predict', 'success')
+        PREDICTIONS.inc(message)
+        url = feature_dict.get('url')
+        cache_verdict = verdicts is not None and isinstance(url, str) and url
+        if cache_verdict and token_matches('X-Verdict-Token', VERDICT_WRITE_TOKEN):
+            try:
+                verdicts.put(url, prediction, message)
+            except ValueError as e:
+                # the prediction stands, there is just no cache key for a url that doesn't parse
+                log.debug(f"verdict not cached: {e}")
+        if shadows is not None:
+            shadows.submit(feature_dict, prediction)
+        log_sampled(logging.INFO, 'prediction', features=feature_dict, response=response,
+                    latency_ms=round((t4 - t0) * 1000, 3))
+        return result
+
     except Exception as e:
         error_response = {
             'success': False,
             'error': str(e)
         }
-        print("=== Error ===")
-        print(json.dumps(error_response, indent=2))
-        print("============\n")
+        REQUESTS.inc('predict', 'error')
+        log.warning('prediction failed', extra={'fields': {'error': str(e)}})
         return jsonify(error_response), 400
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **prediction_cache.stats()})
+
+@app.route('/shadow/stats', methods=['GET'])
+def shadow_stats():
+    if shadows is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **shadows.stats()})
+
+@app.route('/verdict', methods=['GET'])
+def verdict():
+    url = request.args.get('url')
+    if not url:
+        REQUESTS.inc('verdict', 'error')
+        return jsonify({'success': False, 'error': 'missing url parameter'}), 400
+    try:
+        entry = verdicts.get(url) if verdicts is not None else None
+    except ValueError as e:
+        REQUESTS.inc('verdict', 'error')
+        return jsonify({'success': False, 'error': f'invalid url: {e}'}), 400
+    if entry is None:
+        REQUESTS.inc('verdict', 'miss')
+        return jsonify({'success': False, 'cached': False}), 404
+    REQUESTS.inc('verdict', 'hit')
+    now = time.time()
+    return jsonify({
+        'success': True,
+        'cached': True,
+        'prediction': entry['prediction'],
+        'message': entry['message'],
+        'age_s': round(now - entry['created'], 3),
+        'ttl_s': round(entry['expires'] - now, 3)
+    })
+
+def token_matches(header, token):
+    # no token configured means nobody gets in
+    return token is not None and hmac.compare_digest(request.headers.get(header, ''), token)
+
+def admin_allowed():
+    return token_matches('X-Admin-Token', ADMIN_TOKEN)
+
+@app.route('/admin/cache/purge', methods=['POST'])
+def purge_verdicts():
+    if not admin_allowed():
+        return jsonify({'success': False, 'error': 'forbidden'}), 403
+    if verdicts is None:
+        return jsonify({'success': True, 'purged': 0})
+    payload = request.get_json(silent=True) or {}
+    url, domain = payload.get('url'), payload.get('domain')
+    if url is None and domain is None and not payload.get('all'):
+        return jsonify({'success': False, 'error': 'expected url, domain or all: true'}), 400
+    if not all(value is None or isinstance(value, str) for value in (url, domain)):
+        return jsonify({'success': False, 'error': 'url and domain must be strings'}), 400
+    try:
+        purged = verdicts.purge(url=url, domain=domain)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'invalid url: {e}'}), 400
+    log.info('verdict cache purged', extra={'fields': {'url': url, 'domain': domain, 'purged': purged}})
+    # 'purged' counts this worker's entries; the others apply the purge on their next lookup
+    return jsonify({'success': True, 'purged': purged,
+                    'scope': 'all workers' if verdicts.path else 'this worker only'})
+
+@app.route('/feedback', methods=['POST'])
+def add_feedback():
+    if ADMIN_TOKEN is None or not admin_allowed():
+        return jsonify({'success': False, 'error': 'forbidden'}), 403
+    if feedback is None:
+        return jsonify({'success': False, 'error': 'feedback store not configured'}), 404
+    try:
+        feature_dict = request.get_json()
+        if not isinstance(feature_dict, dict) or 'label' not in feature_dict:
+            raise ValueError('expected a JSON object of features and a label')
+        row = [float(feature_dict.get(name, np.nan)) for name in feedback.features]
+        rows = feedback.append([row], [feature_dict['label']])
+    except (ValueError, TypeError) as e:
+        REQUESTS.inc('feedback', 'error')
+        return jsonify({'success': False, 'error': str(e)}), 400
+    # a confirmed label overrides whatever verdict is cached for the url
+    url = feature_dict.get('url')
+    if verdicts is not None and isinstance(url, str) and url:
+        try:
+            verdicts.purge(url=url)
+        except ValueError:
+            pass
+    REQUESTS.inc('feedback', 'success')
+    log.info('feedback stored', extra={'fields': {'url': url, 'label': feature_dict['label'], 'rows': rows}})
+    return jsonify({'success': True, 'rows': rows})
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_model():
+    if not admin_allowed():
+        return jsonify({'success': False, 'error': 'forbidden'}), 403
+    payload = request.get_json(silent=True) or {}
+    # only ever the configured model file: a client-chosen path could point joblib at any pickle on disk
+    path = current.path
+    # loads and validates in the background; GET /admin/reload reports the outcome
+    if not reloader.reload(path, wait=bool(payload.get('wait'))):
+        return jsonify({'success': False, 'error': 'a reload is already running', **reloader.status}), 409
+    return jsonify({'success': True, **reloader.status}), 200 if payload.get('wait') else 202
+
+@app.route('/admin/reload', methods=['GET'])
+def reload_status():
+    # the model path, versions and raw load errors are for operators only
+    if not admin_allowed():
+        return jsonify({'success': False, 'error': 'forbidden'}), 403
+    return jsonify({'model': current.describe(), 'reload': reloader.status})
+
+@app.route('/features/external', methods=['POST'])
+def external_features():
+    # every miss starts whois and spends paid page rank/search API quota, so only trusted callers
+    if not admin_allowed():
+        return jsonify({'success': False, 'error': 'forbidden'}), 403
+    try:
+        payload = request.get_json()
+        url = payload.get('url') if isinstance(payload, dict) else None
+        if not url:
+            raise ValueError('expected a JSON object with a url')
+    except Exception as e:
+        REQUESTS.inc('features_external', 'error')
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    t0 = time.perf_counter()
+    try:
+        domain, features = resolver.resolve(url, timeout=RESOLVER_TIMEOUT)
+    except ValueError as e:
+        REQUESTS.inc('features_external', 'error')
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        REQUESTS.inc('features_external', 'error')
+        log.warning('external feature lookup failed', extra={'fields': {'url': url, 'error': repr(e)}})
+        return jsonify({'success': False, 'error': 'external feature lookup failed'}), 504
+    STAGE_SECONDS.observe(time.perf_counter() - t0, 'features_external', 'resolve')
+    REQUESTS.inc('features_external', 'success')
+    return jsonify({'success': True, 'url': url, 'domain': domain, 'features': features})
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch_route():
+    active = current
+    if active.model is None:
+        REQUESTS.inc('batch', 'model_unavailable')
+        return jsonify({
+            'success': False,
+            'error': 'Model not loaded'
+        }), 500
+
+    content_type = request.headers.get('Content-Type', '')
+    if 'ndjson' in content_type:
+        # stream in, stream out: only one chunk of rows is ever held at a time
+        def generate():
+            items = iter_ndjson(request.stream)
+            while True:
+                chunk = [item for _, item in zip(range(BATCH_CHUNK_SIZE), items)]
+                if not chunk:
+                    break
+                for result in predict_batch(active.model, chunk, features=active.features):
+                    if result['message'] is not None:
+                        PREDICTIONS.inc(result['message'])
+                    yield json.dumps(result) + '\n'
+        REQUESTS.inc('batch_ndjson', 'success')
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    try:
+        t0 = time.perf_counter()
+        payload = request.get_json()
+        if isinstance(payload, dict):
+            payload = payload.get('instances')
+        if not isinstance(payload, list):
+            raise ValueError('expected a JSON array of feature objects')
+        t1 = time.perf_counter()
+        results = predict_batch(active.model, payload, features=active.features)
+        t2 = time.perf_counter()
+        response = jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results
+        })
+        t3 = time.perf_counter()
+
+        STAGE_SECONDS.observe(t1 - t0, 'batch', 'parse')
+        STAGE_SECONDS.observe(t2 - t1, 'batch', 'model')
+        STAGE_SECONDS.observe(t3 - t2, 'batch', 'serialize')
+        REQUESTS.inc('batch', 'success')
+        for result in results:
+            if result['message'] is not None:
+                PREDICTIONS.inc(result['message'])
+        log_sampled(logging.INFO, 'batch prediction', count=len(results),
+                    latency_ms=round((t3 - t0) * 1000, 3))
+        return response
+    except Exception as e:
+        REQUESTS.inc('batch', 'error')
+        log.warning('batch prediction failed', extra={'fields': {'error': str(e)}})
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
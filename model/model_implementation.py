@@ -5,19 +5,24 @@ Automatically generated by Colab.
 
 Original file is located at
     https://colab.research.google.com/drive/1zoWyzEhS71cq_rv34z3KEon2D5Na7m4Y
+
+Data loading lives in dataset.py, fitting and evaluation in training.py and
+the charts in plots.py. matplotlib/seaborn load on the first chart and
+TensorFlow on the first LSTM, so running a single section stays cheap.
 """
 
 # Commented out IPython magic to ensure Python compatibility.
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
-import numpy as np
+import plots
+from dataset import CONTENT_FEATURES, EXTERNAL_FEATURES, URL_FEATURES, encode_status, load_dataset
+from training import (SERVED_DROP, evaluate, export_forest, load_xy, ranked, split, train_decision_tree, train_knn,
+                      train_logistic_regression, train_lstm, train_naive_bayes, train_random_forest, train_svm)
 
 # %matplotlib inline
 
 """###Loading Dataset"""
 
-df = pd.read_csv('REAL_DATASET_FINAL.csv')
+# REAL_DATASET_FINAL.csv by default, set DATASET to a .parquet/.arrow build for faster loads
+df = load_dataset()
 
 df.head()
 
@@ -25,7 +30,7 @@ df.drop(columns=['url'], inplace=True)
 
 list(df.columns)
 
-df['status'] = pd.get_dummies(df['status'])['legitimate'].astype('int')
+df = encode_status(df)
 
 for col in df.columns:
     unique_value_list = df[col].unique()
@@ -37,526 +42,119 @@ for col in df.columns:
 """###Data Analysis"""
 
 print(df['status'].value_counts())
-label_values = df['status'].value_counts()
-
-plt.figure(figsize=(6, 4))
-plt.pie(label_values, labels=['Legitimate', 'Phishing'], autopct='%1.1f%%', startangle=90)
-plt.title('Percentage of Legitimate and Phishing Data')
-plt.show()
-
-plt.figure(figsize=(15, 15))
-sns.heatmap(df.corr(), linewidths=.5)
+plots.label_pie(df['status'])
+plots.correlation_heatmap(df)
 
 """###Model Implemantations
 
 ##Random Forest
 """
 
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
-
-
-# Define features (X) and label (y)
-X = df.drop(columns=['status'])
-X = X.drop(columns=['Website_traffic'])
-
-y = df['status']  # Label (Legitamate / Phishing)
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Initialize the Random Forest Classifier
-rf_model = RandomForestClassifier(random_state=42)
-
-# Fit the model to the training data
-rf_model.fit(X_train, y_train)
-
-# Make predictions on the test data
-y_pred = rf_model.predict(X_test)
-
-# Evaluate the model
-accuracy = accuracy_score(y_test, y_pred)
-print("Accuracy:", accuracy)
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
-
-# Feature importance
-feature_importances = pd.DataFrame({
-    'Feature': X.columns,
-    'Importance': rf_model.feature_importances_
-}).sort_values(by='Importance', ascending=False)
-
-print("\nFeature Importances:\n", feature_importances)
+# Define features (X) and label (y), prepared like every other trainer of the served forest
+X, y = load_xy(drop=SERVED_DROP)
+
+X_train, X_test, y_train, y_test = split(X, y)
+rf_model = train_random_forest(X_train, y_train)
+accuracy = evaluate(y_test, rf_model.predict(X_test))
+
+print("\nFeature Importances:\n", ranked(X.columns, rf_model.feature_importances_))
+
+# Export the forest for modelServer.py (memory-mapped .forest artifact, see forest_artifact.py)
+export_forest(rf_model, 'random_forest_model.forest', train_rows=len(X_train), test_rows=len(X_test),
+              test_accuracy=accuracy)
+
+# Compaction: smaller/distilled candidates against rf_model, see compact_forest.py.
+# The most accurate one within the per-verdict budget is exported next to the full forest;
+# point MODEL_PATH at it to serve it.
+from compact_forest import compact, pick, print_report
+
+VERDICT_BUDGET_MS = 0.15
+MAX_ACCURACY_LOSS = 0.005
+
+compact_rows, compact_models = compact(rf_model, X_train, y_train, X_test, y_test)
+chosen = pick(compact_rows, VERDICT_BUDGET_MS, MAX_ACCURACY_LOSS)
+print_report(compact_rows, chosen)
+if chosen is not None:
+    export_forest(
+        compact_models[chosen['model']],
+        'random_forest_model.compact.forest',
+        model=chosen['model'],
+        compacted_from='RandomForestClassifier',
+        test_accuracy=chosen['accuracy'],
+        accuracy_loss=chosen['accuracy_loss'],
+        latency_p50_ms=chosen['latency_ms']['p50'],
+    )
 
 """#Decision Tree"""
 
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.tree import DecisionTreeClassifier, export_text
-from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
-
-
+from sklearn.tree import export_text
 
-# Define features (X) and target (y)
-X = df.drop(columns=['status'])  # Drop the target column
-y = df['status']  # Target variable
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Initialize the Decision Tree Classifier
-dt_model = DecisionTreeClassifier(random_state=42)
-
-# Fit the model to the training data
-dt_model.fit(X_train, y_train)
-
-# Make predictions on the test data
-y_pred = dt_model.predict(X_test)
+X = df.drop(columns=['status'])
+y = df['status']
 
-# Evaluate the model
-accuracy = accuracy_score(y_test, y_pred)
-print("Accuracy:", accuracy)
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
+X_train, X_test, y_train, y_test = split(X, y)
+dt_model = train_decision_tree(X_train, y_train)
+evaluate(y_test, dt_model.predict(X_test))
 
 # Visualizing the decision tree structure (in text format)
 tree_rules = export_text(dt_model, feature_names=list(X.columns))
 print("\nDecision Tree Rules:\n", tree_rules)
 
-# Feature importance
-feature_importances = pd.DataFrame({
-    'Feature': X.columns,
-    'Importance': dt_model.feature_importances_
-}).sort_values(by='Importance', ascending=False)
-
-print("\nFeature Importances:\n", feature_importances)
+print("\nFeature Importances:\n", ranked(X.columns, dt_model.feature_importances_))
 
 """#Logistic Regression"""
 
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
-
-# Define features (X) and target (y)
-X = df.drop(columns=['status'])  # Drop the target column
-y = df['status']  # Target variable
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+lr_model = train_logistic_regression(X_train, y_train)
+evaluate(y_test, lr_model.predict(X_test))
 
-# Initialize the Logistic Regression model
-lr_model = LogisticRegression(max_iter=1000, random_state=42)  # Increased max_iter to ensure convergence
-
-# Fit the model to the training data
-lr_model.fit(X_train, y_train)
-
-# Make predictions on the test data
-y_pred = lr_model.predict(X_test)
-
-# Evaluate the model
-accuracy = accuracy_score(y_test, y_pred)
-print("Accuracy:", accuracy)
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
-
-# Feature importance (coefficients)
-coefficients = pd.DataFrame({
-    'Feature': X.columns,
-    'Coefficient': lr_model.coef_[0]
-}).sort_values(by='Coefficient', ascending=False)
-
-print("\nFeature Coefficients:\n", coefficients)
+print("\nFeature Coefficients:\n", ranked(X.columns, lr_model.coef_[0], 'Coefficient'))
 
 """#Naive Bayes"""
 
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.naive_bayes import GaussianNB
-from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
-
-
-# Define features (X) and target (y)
-X = df.drop(columns=['status'])  # Drop the target column
-y = df['status']  # Target variable
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Initialize the Naive Bayes model
-nb_model = GaussianNB()
-
-# Fit the model to the training data
-nb_model.fit(X_train, y_train)
-
-# Make predictions on the test data
-y_pred = nb_model.predict(X_test)
-
-# Evaluate the model
-accuracy = accuracy_score(y_test, y_pred)
-print("Accuracy:", accuracy)
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
+nb_model = train_naive_bayes(X_train, y_train)
+evaluate(y_test, nb_model.predict(X_test))
 
 """#SVM"""
 
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.svm import SVC
-from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
-from sklearn.preprocessing import StandardScaler
-
-# Define features (X) and target (y)
-X = df.drop(columns=['status'])  # Drop the target column
-y = df['status']  # Target variable
-
-# Standardize the features for SVM
-scaler = StandardScaler()
-X = pd.DataFrame(scaler.fit_transform(X), columns=X.columns)
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Initialize the SVM model
-svm_model = SVC(kernel='rbf', random_state=42)  # 'rbf' kernel is commonly used
-
-# Fit the model to the training data
-svm_model.fit(X_train, y_train)
-
-# Make predictions on the test data
-y_pred = svm_model.predict(X_test)
-
-# Evaluate the model
-accuracy = accuracy_score(y_test, y_pred)
-print("Accuracy:", accuracy)
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
+# standardized inside the pipeline (see training.train_svm)
+svm_model = train_svm(X_train, y_train)
+evaluate(y_test, svm_model.predict(X_test))
 
 """#LTSM"""
 
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM, Dropout
-from tensorflow.keras.utils import to_categorical
-
-
-# Define features (X) and target (y)
-X = df.drop(columns=['status']).values  # Drop the target column and convert to NumPy array
-y = df['status'].values  # Target variable
-
-# Encode the labels (if not already numeric)
-label_encoder = LabelEncoder()
-y = label_encoder.fit_transform(y)
-
-# Scale the features for better training performance
-scaler = StandardScaler()
-X = scaler.fit_transform(X)
-
-# Reshape X for LSTM (samples, timesteps, features)
-# Assuming each row is a sequence of one timestep with multiple features
-X = np.reshape(X, (X.shape[0], 1, X.shape[1]))
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Convert y to categorical (one-hot encoding)
-y_train = to_categorical(y_train)
-y_test = to_categorical(y_test)
-
-# Build the LSTM model
-model = Sequential()
-model.add(LSTM(50, return_sequences=True, input_shape=(X_train.shape[1], X_train.shape[2])))
-model.add(Dropout(0.2))
-model.add(LSTM(50, return_sequences=False))
-model.add(Dropout(0.2))
-model.add(Dense(25, activation='relu'))
-model.add(Dense(y_train.shape[1], activation='softmax'))  # Output layer
-
-# Compile the model
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-
-# Train the model
-history = model.fit(X_train, y_train, epochs=20, batch_size=32, validation_data=(X_test, y_test), verbose=1)
-
-# Evaluate the model
-loss, accuracy = model.evaluate(X_test, y_test, verbose=1)
-print(f"Test Loss: {loss}")
-print(f"Test Accuracy: {accuracy}")
-
-# Predictions and evaluation
-y_pred = model.predict(X_test)
-y_pred_classes = np.argmax(y_pred, axis=1)
-y_test_classes = np.argmax(y_test, axis=1)
-
-# Classification report
-from sklearn.metrics import classification_report, confusion_matrix
-print("\nClassification Report:\n", classification_report(y_test_classes, y_pred_classes))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test_classes, y_pred_classes))
+predict, lstm_model, history = train_lstm(X_train, y_train, epochs=20, validation_data=(X_test, y_test), verbose=1)
+evaluate(y_test, predict(X_test))
 
 """#KNN Model"""
 
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
+X, y = load_xy()
+X_train, X_test, y_train, y_test = split(X, y)
 
-df = pd.read_csv('REAL_DATASET_FINAL.csv')
-
-# Define features (X) and target (y)
-X = df.drop(columns=['status'])  # Drop the target column
-y = df['status']  # Target variable
-
-# Scale the features for KNN
-scaler = StandardScaler()
-X = scaler.fit_transform(X)
 components = range(1, 20)
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 acc_scores = []
-for i in range(1, 20):
-# Initialize the KNN model with k=5 (you can experiment with this)
-  knn_model = KNeighborsClassifier(n_neighbors=i)
-
-  # Fit the model to the training data
-  knn_model.fit(X_train, y_train)
-
-  # Make predictions on the test data
-  y_pred = knn_model.predict(X_test)
-
-  # Evaluate the model
-  accuracy = accuracy_score(y_test, y_pred)
-  acc_scores.append(accuracy)
-
-plt.figure(figsize=(10, 6))
-plt.plot(components, acc_scores, marker='o', linestyle='-', linewidth=2, markersize=6)
-plt.title('Accuracy vs. Number of k', fontsize=16)
-plt.xlabel('k', fontsize=14)
-plt.ylabel('Accuracy', fontsize=14)
-plt.grid(True, linestyle='--', alpha=0.6)
-plt.xticks(components)
-plt.tight_layout()
-plt.show()
-print("Accuracy:", accuracy)
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
-
-from sklearn.model_selection import cross_val_score
-
-# Test different values of k
-k_values = range(1, 50)
-accuracies = []
-
-for k in k_values:
-    knn_model = KNeighborsClassifier(n_neighbors=k)
-    scores = cross_val_score(knn_model, X_train, y_train, cv=5, scoring='accuracy')
-    accuracies.append(scores.mean())
+for i in components:
+    knn_model = train_knn(X_train, y_train, k=i)
+    y_pred = knn_model.predict(X_test)
+    acc_scores.append((y_pred == y_test).mean())
 
-# Plot k vs accuracy
-import matplotlib.pyplot as plt
+plots.accuracy_vs_k(components, acc_scores)
+evaluate(y_test, y_pred)
 
-plt.plot(k_values, accuracies, marker='o')
-plt.xlabel('Number of Neighbors (k)')
-plt.ylabel('Cross-Validated Accuracy')
-plt.title('KNN Hyperparameter Tuning')
-plt.show()
+from fast_search import knn_cv_curve
 
-"""#MODEL PERFORMANCES ON DIFFERENT CATEGORIES"""
+# Test different values of k: 5-fold CV like cross_val_score, but each fold finds its
+# neighbours once at k=49 and every smaller k reuses them (see fast_search.py)
+k_values = range(1, 50)
+accuracies = knn_cv_curve(X_train, y_train, max_k=max(k_values))
 
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM, Dropout
-from tensorflow.keras.utils import to_categorical
-
-
-df = pd.read_csv('URL_based_features.csv')
-
-# Define features (X) and target (y)
-X = df.drop(columns=['status']).values  # Drop the target column and convert to NumPy array
-y = df['status'].values  # Target variable
-
-# Encode the labels (if not already numeric)
-label_encoder = LabelEncoder()
-y = label_encoder.fit_transform(y)
-
-# Scale the features for better training performance
-scaler = StandardScaler()
-X = scaler.fit_transform(X)
-
-# Reshape X for LSTM (samples, timesteps, features)
-# Assuming each row is a sequence of one timestep with multiple features
-X = np.reshape(X, (X.shape[0], 1, X.shape[1]))
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Convert y to categorical (one-hot encoding)
-y_train = to_categorical(y_train)
-y_test = to_categorical(y_test)
-
-# Build the LSTM model
-model = Sequential()
-model.add(LSTM(50, return_sequences=True, input_shape=(X_train.shape[1], X_train.shape[2])))
-model.add(Dropout(0.2))
-model.add(LSTM(50, return_sequences=False))
-model.add(Dropout(0.2))
-model.add(Dense(25, activation='relu'))
-model.add(Dense(y_train.shape[1], activation='softmax'))  # Output layer
-
-# Compile the model
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-
-# Train the model
-history = model.fit(X_train, y_train, epochs=20, batch_size=32, validation_data=(X_test, y_test), verbose=1)
-
-# Evaluate the model
-loss, accuracy = model.evaluate(X_test, y_test, verbose=1)
-print(f"Test Loss: {loss}")
-print(f"Test Accuracy: {accuracy}")
-
-# Predictions and evaluation
-y_pred = model.predict(X_test)
-y_pred_classes = np.argmax(y_pred, axis=1)
-y_test_classes = np.argmax(y_test, axis=1)
-
-# Classification report
-from sklearn.metrics import classification_report, confusion_matrix
-print("\nClassification Report:\n", classification_report(y_test_classes, y_pred_classes))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test_classes, y_pred_classes))
-
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM, Dropout
-from tensorflow.keras.utils import to_categorical
-
-
-df = pd.read_csv('content_based_features.csv')
-
-# Define features (X) and target (y)
-X = df.drop(columns=['status']).values  # Drop the target column and convert to NumPy array
-y = df['status'].values  # Target variable
-
-# Encode the labels (if not already numeric)
-label_encoder = LabelEncoder()
-y = label_encoder.fit_transform(y)
-
-# Scale the features for better training performance
-scaler = StandardScaler()
-X = scaler.fit_transform(X)
-
-# Reshape X for LSTM (samples, timesteps, features)
-# Assuming each row is a sequence of one timestep with multiple features
-X = np.reshape(X, (X.shape[0], 1, X.shape[1]))
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Convert y to categorical (one-hot encoding)
-y_train = to_categorical(y_train)
-y_test = to_categorical(y_test)
-
-# Build the LSTM model
-model = Sequential()
-model.add(LSTM(50, return_sequences=True, input_shape=(X_train.shape[1], X_train.shape[2])))
-model.add(Dropout(0.2))
-model.add(LSTM(50, return_sequences=False))
-model.add(Dropout(0.2))
-model.add(Dense(25, activation='relu'))
-model.add(Dense(y_train.shape[1], activation='softmax'))  # Output layer
-
-# Compile the model
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-
-# Train the model
-history = model.fit(X_train, y_train, epochs=20, batch_size=32, validation_data=(X_test, y_test), verbose=1)
-
-# Evaluate the model
-loss, accuracy = model.evaluate(X_test, y_test, verbose=1)
-print(f"Test Loss: {loss}")
-print(f"Test Accuracy: {accuracy}")
-
-# Predictions and evaluation
-y_pred = model.predict(X_test)
-y_pred_classes = np.argmax(y_pred, axis=1)
-y_test_classes = np.argmax(y_test, axis=1)
-
-# Classification report
-from sklearn.metrics import classification_report, confusion_matrix
-print("\nClassification Report:\n", classification_report(y_test_classes, y_pred_classes))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test_classes, y_pred_classes))
-
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM, Dropout
-from tensorflow.keras.utils import to_categorical
-
-
-df = pd.read_csv('external_based_features.csv')
-
-# Define features (X) and target (y)
-X = df.drop(columns=['status']).values  # Drop the target column and convert to NumPy array
-y = df['status'].values  # Target variable
-
-# Encode the labels (if not already numeric)
-label_encoder = LabelEncoder()
-y = label_encoder.fit_transform(y)
-
-# Scale the features for better training performance
-scaler = StandardScaler()
-X = scaler.fit_transform(X)
-
-# Reshape X for LSTM (samples, timesteps, features)
-# Assuming each row is a sequence of one timestep with multiple features
-X = np.reshape(X, (X.shape[0], 1, X.shape[1]))
-
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Convert y to categorical (one-hot encoding)
-y_train = to_categorical(y_train)
-y_test = to_categorical(y_test)
-
-# Build the LSTM model
-model = Sequential()
-model.add(LSTM(50, return_sequences=True, input_shape=(X_train.shape[1], X_train.shape[2])))
-model.add(Dropout(0.2))
-model.add(LSTM(50, return_sequences=False))
-model.add(Dropout(0.2))
-model.add(Dense(25, activation='relu'))
-model.add(Dense(y_train.shape[1], activation='softmax'))  # Output layer
+plots.accuracy_vs_k(k_values, accuracies, title='KNN Hyperparameter Tuning', ylabel='Cross-Validated Accuracy')
 
-# Compile the model
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-
-# Train the model
-history = model.fit(X_train, y_train, epochs=20, batch_size=32, validation_data=(X_test, y_test), verbose=1)
-
-# Evaluate the model
-loss, accuracy = model.evaluate(X_test, y_test, verbose=1)
-print(f"Test Loss: {loss}")
-print(f"Test Accuracy: {accuracy}")
-
-# Predictions and evaluation
-y_pred = model.predict(X_test)
-y_pred_classes = np.argmax(y_pred, axis=1)
-y_test_classes = np.argmax(y_test, axis=1)
-
-# Classification report
-from sklearn.metrics import classification_report, confusion_matrix
-print("\nClassification Report:\n", classification_report(y_test_classes, y_pred_classes))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test_classes, y_pred_classes))
+"""#MODEL PERFORMANCES ON DIFFERENT CATEGORIES"""
 
+for name, features in [('URL', URL_FEATURES), ('Content', CONTENT_FEATURES), ('External', EXTERNAL_FEATURES)]:
+    print(f"\n{name} features: {features}")
+    X, y = load_xy(features=features)
+    X_train, X_test, y_train, y_test = split(X, y)
+    predict, lstm_model, history = train_lstm(X_train, y_train, epochs=20,
+                                              validation_data=(X_test, y_test), verbose=1)
+    evaluate(y_test, predict(X_test))
@@ -0,0 +1,38 @@
+"""Charts for the dataset and model experiments.
+
+matplotlib and seaborn are imported inside each function, so importing
+this module (or anything that imports it) costs nothing until a chart is
+actually drawn.
+"""
+
+
+def label_pie(status):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(6, 4))
+    plt.pie(status.value_counts(), labels=['Legitimate', 'Phishing'], autopct='%1.1f%%', startangle=90)
+    plt.title('Percentage of Legitimate and Phishing Data')
+    plt.show()
+
+
+def correlation_heatmap(df):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(15, 15))
+    sns.heatmap(df.corr(), linewidths=.5)
+    plt.show()
+
+
+def accuracy_vs_k(k_values, accuracies, title='Accuracy vs. Number of k', ylabel='Accuracy'):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(k_values, accuracies, marker='o', linestyle='-', linewidth=2, markersize=6)
+    plt.title(title, fontsize=16)
+    plt.xlabel('k', fontsize=14)
+    plt.ylabel(ylabel, fontsize=14)
+    plt.grid(True, linestyle='--', alpha=0.6)
+    plt.xticks(list(k_values)[::max(1, len(k_values) // 20)])
+    plt.tight_layout()
+    plt.show()
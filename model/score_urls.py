@@ -0,0 +1,150 @@
+"""Offline bulk scoring of URL lists with the saved forest.
+
+Reads one URL per line (a file, or stdin with '-'), computes the URL-lexical
+features locally, scores them in batches and writes a CSV as it goes:
+
+    python score_urls.py ../testURLs.txt --output scores.csv
+    zcat feed.txt.gz | python score_urls.py - --model random_forest_model.forest > scores.csv
+
+The lexical features are first computed as the raw dataset_B columns (the
+way that dataset defines them) and then mapped through the same thresholds
+as all_features_extracted.py, so they match what the model was trained on.
+The features that need the page, WHOIS, DNS or search APIs are not
+available offline; they are left missing (NaN, which the compiled forest
+routes like it does at serve time) unless --fill gives a value.
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from vectorized_features import FEATURES  # noqa: E402
+
+from forest_artifact import load_forest  # noqa: E402
+
+LEXICAL_FEATURES = [
+    'having_IP_Address', 'URL_Length', 'Shortining_Service',
+    'having_At_Symbol', 'double_slash_redirecting', 'Prefix_Suffix',
+    'having_Sub_Domain', 'Port', 'HTTPS_token',
+]
+
+LABELS = {0: 'phishing', 1: 'legitimate'}
+
+IP_HOST = re.compile(
+    r'^(\d{1,3}\.){3}\d{1,3}$'            # IPv4
+    r'|^(0x[0-9a-f]{1,2}\.){3}0x[0-9a-f]{1,2}$'  # IPv4 in hex
+    r'|^\[?[0-9a-f:]+:[0-9a-f:.]*\]?$'    # IPv6
+    r'|^\d{8,10}$',                       # IPv4 as a single number
+    re.IGNORECASE)
+SHORTENERS = re.compile(
+    r'(^|\.)(bit\.ly|goo\.gl|shorte\.st|go2l\.ink|x\.co|ow\.ly|t\.co|tinyurl|tr\.im|is\.gd|cli\.gs|'
+    r'yfrog\.com|migre\.me|ff\.im|tiny\.cc|url4\.eu|twit\.ac|su\.pr|twurl\.nl|snipurl\.com|'
+    r'short\.to|budurl\.com|ping\.fm|post\.ly|just\.as|bkite\.com|snipr\.com|fic\.kr|loopt\.us|'
+    r'doiop\.com|short\.ie|kl\.am|wp\.me|rubyurl\.com|om\.ly|to\.ly|bit\.do|lnkd\.in|db\.tt|'
+    r'qr\.ae|adf\.ly|bitly\.com|cur\.lv|ity\.im|q\.gs|po\.st|bc\.vc|twitthis\.com|u\.to|j\.mp|'
+    r'buzurl\.com|cutt\.us|u\.bb|yourls\.org|prettylinkpro\.com|scrnch\.me|filoops\.info|'
+    r'vzturl\.com|qr\.net|1url\.com|tweez\.me|v\.gd|link\.zip\.net|buff\.ly|rebrand\.ly)',
+    re.IGNORECASE)
+PREFIX_SUFFIX = re.compile(r'https?://[^\-]+-[^\-]+/')
+EXPLICIT_PORT = re.compile(r'^[a-z][a-z0-9+\-.]*://([^/@]+@)?(\[[^\]]+\]|[^/:?#]+):[0-9]+', re.IGNORECASE)
+
+
+def raw_columns(urls):
+    """The dataset_B raw columns the lexical features are derived from, one array each."""
+    raw = {name: np.empty(len(urls), dtype=np.int64) for name in (
+        'ip', 'length_url', 'shortening_service', 'nb_at', 'nb_dslash',
+        'prefix_suffix', 'nb_subdomains', 'port', 'https_token')}
+    for i, url in enumerate(urls):
+        try:
+            parts = urlsplit(url)
+            host = parts.hostname or ''
+            scheme = parts.scheme
+        except ValueError:
+            host, scheme = '', ''
+        dots = host.count('.')
+        raw['ip'][i] = 1 if IP_HOST.match(host) else 0
+        raw['length_url'][i] = len(url)
+        raw['shortening_service'][i] = 1 if SHORTENERS.search(host) else 0
+        raw['nb_at'][i] = url.count('@')
+        raw['nb_dslash'][i] = 1 if url.rfind('//') > 6 else 0
+        raw['prefix_suffix'][i] = 1 if PREFIX_SUFFIX.match(url) else 0
+        raw['nb_subdomains'][i] = dots if dots in (1, 2) else 3
+        raw['port'][i] = 1 if EXPLICIT_PORT.match(url) else 0
+        # dataset_B sets https_token to 0 for https URLs
+        raw['https_token'][i] = 0 if scheme == 'https' else 1
+    return raw
+
+
+def feature_matrix(urls, feature_names, fill=np.nan):
+    raw = raw_columns(urls)
+    X = np.full((len(urls), len(feature_names)), fill, dtype=np.float32)
+    for j, name in enumerate(feature_names):
+        if name in LEXICAL_FEATURES:
+            column, fn = FEATURES[name]
+            X[:, j] = fn(raw[column])
+    return X
+
+
+def read_urls(stream, batch_size):
+    batch = []
+    for line in stream:
+        url = line.strip()
+        if not url or url.startswith('#'):
+            continue
+        batch.append(url)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score(model, stream, out, batch_size=4096, fill=np.nan):
+    names = getattr(model, 'feature_names_in_', None)
+    feature_names = [str(n) for n in names] if names is not None else list(FEATURES)
+    header = getattr(model, 'artifact_header', None) or {}
+    labels = {int(k): v for k, v in header.get('label_names', {}).items()} or LABELS
+
+    writer = csv.writer(out)
+    writer.writerow(['url', 'prediction', 'label', 'confidence'])
+    total = 0
+    for urls in read_urls(stream, batch_size):
+        proba = model.predict_proba(feature_matrix(urls, feature_names, fill))
+        best = proba.argmax(axis=1)
+        predictions = np.asarray(model.classes_)[best]
+        confidences = proba[np.arange(len(urls)), best]
+        writer.writerows(
+            (url, int(p), labels.get(int(p), ''), f'{c:.4f}')
+            for url, p, c in zip(urls, predictions, confidences)
+        )
+        out.flush()
+        total += len(urls)
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a list of URLs offline with the saved forest')
+    parser.add_argument('urls', help="file with one URL per line, or '-' for stdin")
+    parser.add_argument('--model', default='random_forest_model.forest' if os.path.exists('random_forest_model.forest')
+                        else 'random_forest_model.pkl', help='.forest artifact or joblib pickle')
+    parser.add_argument('--output', help='CSV to write (default: stdout)')
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--fill', type=float, default=np.nan,
+                        help='value for the features that need network lookups (default: missing)')
+    args = parser.parse_args()
+
+    model = load_forest(args.model)
+    stream = sys.stdin if args.urls == '-' else open(args.urls, encoding='utf-8', errors='replace')
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    start = time.perf_counter()
+    with stream, out:
+        total = score(model, stream, out, args.batch_size, args.fill)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {total} URLs in {elapsed:.2f} s ({total / max(elapsed, 1e-9):,.0f} URLs/s)", file=sys.stderr)
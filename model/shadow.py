@@ -0,0 +1,140 @@
+"""Shadow evaluation of candidate models next to the serving model.
+
+The request path only hands the feature dict and the primary's prediction
+to a bounded queue (put_nowait). A small pool of worker threads scores the
+shadow models off that queue and records, per model, how often it agrees
+with the primary and how long it took. When the queue is full the shadow
+work for that request is dropped and counted, so a slow shadow can never
+push back on user verdicts.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from forest_artifact import load_forest
+
+log = logging.getLogger('modelServer.shadow')
+
+
+def parse_spec(spec):
+    """'tree=dt.pkl,compact=rf.compact.forest' -> [('tree', 'dt.pkl'), ('compact', 'rf.compact.forest')]"""
+    models = []
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, sep, path = item.partition('=')
+        if not sep:
+            name, path = os.path.splitext(os.path.basename(item))[0], item
+        models.append((name.strip(), path.strip()))
+    return models
+
+
+class ShadowModel:
+    def __init__(self, name, model, feature_names):
+        self.name = name
+        self.model = model
+        self.feature_names = list(feature_names)
+
+    def predict(self, feature_dict):
+        row = np.array([[feature_dict.get(name, np.nan) for name in self.feature_names]], dtype=np.float32)
+        return int(self.model.predict(row)[0])
+
+
+class ShadowRunner:
+    def __init__(self, shadows, registry=None, workers=2, max_queue=1000):
+        self.shadows = list(shadows)
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        self._pid = None
+        self.submitted = 0
+        self.dropped = 0
+        self._counts = {s.name: {'evaluated': 0, 'disagreements': 0, 'errors': 0} for s in self.shadows}
+        self._evals = self._seconds = self._dropped = None
+        if registry is not None:
+            self._evals = registry.counter('phish_shadow_evaluations_total', 'Shadow model evaluations by outcome',
+                                           labels=('model', 'outcome'))
+            self._seconds = registry.histogram('phish_shadow_seconds', 'Shadow model latency per row',
+                                               labels=('model',))
+            self._dropped = registry.counter('phish_shadow_dropped_total', 'Shadow requests dropped on a full queue')
+
+    @classmethod
+    def from_spec(cls, spec, feature_order, **kwargs):
+        shadows = []
+        for name, path in parse_spec(spec):
+            try:
+                model = load_forest(path)
+            except Exception as e:
+                log.error(f"Error loading shadow model {name}: {e}", extra={'fields': {'path': path}})
+                continue
+            shadows.append(ShadowModel(name, model, feature_order(model)))
+            log.info(f"Shadow model {name} loaded", extra={'fields': {'path': path, 'type': type(model).__name__}})
+        return cls(shadows, **kwargs) if shadows else None
+
+    def _ensure_workers(self):
+        # like MicroBatcher: worker threads don't survive fork, each gunicorn worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(self.max_queue)
+                for _ in range(self.workers):
+                    threading.Thread(target=self._run, args=(self._queue,), daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, feature_dict, prediction):
+        """Queue shadow scoring for one request; never blocks. False when it had to be dropped."""
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait((dict(feature_dict), prediction))
+        except queue.Full:
+            self.dropped += 1
+            if self._dropped is not None:
+                self._dropped.inc()
+            return False
+        self.submitted += 1
+        return True
+
+    def _run(self, q):
+        while True:
+            feature_dict, primary = q.get()
+            for shadow in self.shadows:
+                counts = self._counts[shadow.name]
+                start = time.perf_counter()
+                try:
+                    prediction = shadow.predict(feature_dict)
+                except Exception as e:
+                    outcome = 'error'
+                    log.debug(f"shadow {shadow.name} failed: {e}")
+                else:
+                    outcome = 'agree' if prediction == primary else 'disagree'
+                    if self._seconds is not None:
+                        self._seconds.observe(time.perf_counter() - start, shadow.name)
+                with self._lock:
+                    if outcome == 'error':
+                        counts['errors'] += 1
+                    else:
+                        counts['evaluated'] += 1
+                        counts['disagreements'] += outcome == 'disagree'
+                if self._evals is not None:
+                    self._evals.inc(shadow.name, outcome)
+
+    def stats(self):
+        models = {}
+        with self._lock:
+            snapshot = {name: dict(counts) for name, counts in self._counts.items()}
+        for name, counts in snapshot.items():
+            evaluated = counts['evaluated']
+            models[name] = {**counts, 'disagreement_rate': counts['disagreements'] / evaluated if evaluated else 0.0}
+        return {
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize(),
+            'max_queue': self.max_queue,
+            'workers': self.workers,
+            'models': models,
+        }
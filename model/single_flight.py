@@ -0,0 +1,70 @@
+"""Single-flight coalescing of identical concurrent computations.
+
+When a phishing link spreads, many clients send the same features at the
+same moment. The first request for a key runs the computation; requests
+for the same key that arrive while it is still running wait for it and
+share its result (or its exception) instead of scoring the row again.
+Nothing is kept once the computation finishes, that is what the
+prediction and verdict caches are for.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _Call:
+    def __init__(self):
+        self.future = Future()
+        self.seconds = 0.0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.followers = 0
+        self.saved_seconds = 0.0
+
+    def do(self, key, fn):
+        """(fn(), shared): fn runs once per key at a time, concurrent callers with that key get its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        if not leader:
+            result = call.future.result()
+            with self._lock:
+                self.saved_seconds += call.seconds
+            return result, True
+
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except BaseException as e:
+            call.seconds = time.perf_counter() - start
+            call.future.set_exception(e)
+            raise
+        else:
+            call.seconds = time.perf_counter() - start
+            call.future.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            total = self.leaders + self.followers
+            return {
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'in_flight': len(self._calls),
+                'coalesced_rate': self.followers / total if total else 0.0,
+                'saved_seconds': self.saved_seconds,
+            }
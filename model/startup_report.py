@@ -0,0 +1,92 @@
+"""Cold start time and memory of the serving and training entry points.
+
+Each scenario runs in a fresh interpreter, a few times, and reports the
+median wall time of the whole process, the time spent importing/loading,
+its RSS afterwards and which heavy libraries ended up imported:
+
+    python startup_report.py --forest random_forest_model.forest --pickle random_forest_model.pkl
+
+The server rows are what every gunicorn worker starts from.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY = ('pandas', 'sklearn', 'scipy', 'matplotlib', 'seaborn', 'tensorflow')
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+from metrics import rss_mb
+print(json.dumps({{'seconds': elapsed, 'rss_mb': rss_mb(),
+                  'heavy_modules': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def scenarios(forest=None, pickle=None, data=None):
+    out = []
+    if forest:
+        out.append(('server, .forest artifact', 'import modelServer', {'MODEL_PATH': forest}))
+    if pickle:
+        out.append(('server, pickle', 'import modelServer', {'MODEL_PATH': pickle}))
+    out.append(('training module', 'import training', {}))
+    out.append(('plots module', 'import plots', {}))
+    if data:
+        out.append(('train random forest', 'from training import load_xy, split, train_random_forest\n'
+                    'X_train, _, y_train, _ = split(*load_xy())\ntrain_random_forest(X_train, y_train)',
+                    {'DATASET': data}))
+    return out
+
+
+def measure(code, env, repeat=3):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', PROBE.format(code=code, heavy=HEAVY)],
+                              env={**os.environ, **env}, capture_output=True, text=True)
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'probe failed')
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result['wall_seconds'] = wall
+        runs.append(result)
+    return {
+        'wall_seconds': statistics.median(r['wall_seconds'] for r in runs),
+        'load_seconds': statistics.median(r['seconds'] for r in runs),
+        'rss_mb': statistics.median(r['rss_mb'] for r in runs),
+        'heavy_modules': runs[-1]['heavy_modules'],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cold start and memory report')
+    parser.add_argument('--forest', help='.forest artifact to start the server with')
+    parser.add_argument('--pickle', help='joblib pickle to start the server with')
+    parser.add_argument('--data', help='also time training the random forest on this dataset')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='startup_report.json')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'scenario':<28} {'process s':>10} {'load s':>8} {'RSS MB':>8}  heavy modules")
+    for name, code, env in scenarios(args.forest, args.pickle, args.data):
+        try:
+            result = {'scenario': name, **measure(code, env, args.repeat)}
+        except RuntimeError as e:
+            print(f"{name:<28} failed: {e}")
+            continue
+        results.append(result)
+        print(f"{name:<28} {result['wall_seconds']:>10.2f} {result['load_seconds']:>8.2f} {result['rss_mb']:>8.1f}  "
+              f"{', '.join(result['heavy_modules']) or '-'}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'python_version': sys.version.split()[0], 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   'results': results}, f, indent=2)
+    print(f"Report saved to {args.output}")
@@ -0,0 +1,161 @@
+"""Memoizing predictor for the ternary feature space.
+
+Every feature the model sees is -1, 0 or 1, so a feature vector packs into
+a single int (2 bits per feature) and real traffic keeps repeating the
+same few thousand vectors. MemoPredictor answers those from a dict and
+only sends unseen vectors to the wrapped model.
+"""
+
+import csv
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def pack_rows(X):
+    """One int key per row, or -1 for rows that aren't all in {-1, 0, 1}."""
+    X = np.asarray(X, dtype=np.float32)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    codes = np.nan_to_num(X, nan=9.0) + 1
+    valid = ((codes == 0) | (codes == 1) | (codes == 2)).all(axis=1)
+    weights = 4 ** np.arange(X.shape[1] - 1, -1, -1, dtype=np.int64)
+    keys = codes.astype(np.int64) @ weights
+    return np.where(valid, keys, -1)
+
+
+def unpack_keys(keys, n_features):
+    """Feature rows back from pack_rows() keys (valid keys only)."""
+    keys = np.asarray(keys, dtype=np.int64).reshape(-1, 1)
+    weights = 4 ** np.arange(n_features - 1, -1, -1, dtype=np.int64)
+    return ((keys // weights) % 4 - 1).astype(np.float32)
+
+
+class MemoPredictor:
+    def __init__(self, model, maxsize=65536):
+        self.model = model
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        # precomputed entries never get evicted
+        self._pinned = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def __getattr__(self, name):
+        # classes_, feature_names_in_ etc. come from the wrapped model
+        return getattr(self.model, name)
+
+    def _lookup(self, key):
+        proba = self._pinned.get(key)
+        if proba is None:
+            proba = self._lru.get(key)
+            if proba is not None:
+                self._lru.move_to_end(key)
+        return proba
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        keys = pack_rows(X)
+        out = np.empty((X.shape[0], len(self.model.classes_)), dtype=np.float64)
+        todo = []
+        with self._lock:
+            for i, key in enumerate(keys.tolist()):
+                proba = self._lookup(key) if key >= 0 else None
+                if proba is None:
+                    todo.append(i)
+                else:
+                    out[i] = proba
+            self.hits += X.shape[0] - len(todo)
+        if not todo:
+            return out
+
+        # all the misses go to the model in one call
+        computed = self.model.predict_proba(X[todo])
+        out[todo] = computed
+        with self._lock:
+            for i, proba in zip(todo, computed):
+                key = int(keys[i])
+                if key < 0:
+                    self.bypassed += 1
+                    continue
+                self.misses += 1
+                if self.maxsize and key not in self._pinned:
+                    self._lru[key] = proba
+                    self._lru.move_to_end(key)
+                    if len(self._lru) > self.maxsize:
+                        self._lru.popitem(last=False)
+        return out
+
+    def predict(self, X):
+        return self.model.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def precompute(self, X):
+        """Score every distinct vector in X once and pin the results."""
+        keys = pack_rows(X)
+        keys, first = np.unique(keys, return_index=True)
+        first = first[keys >= 0]
+        keys = keys[keys >= 0]
+        if not len(keys):
+            return 0
+        probas = self.model.predict_proba(np.asarray(X, dtype=np.float32)[first])
+        with self._lock:
+            self._pinned.update(zip(keys.tolist(), probas))
+        return len(keys)
+
+    def recent_rows(self, n, n_features):
+        """The n vectors this cache served most recently, newest first."""
+        with self._lock:
+            keys = []
+            for key in reversed(self._lru):
+                if len(keys) >= n:
+                    break
+                keys.append(key)
+        return unpack_keys(keys, n_features)
+
+    def warm(self, X):
+        """Score the distinct vectors in X into the LRU part, without touching the hit counters."""
+        keys = pack_rows(X)
+        keys, first = np.unique(keys, return_index=True)
+        first = first[keys >= 0]
+        keys = keys[keys >= 0]
+        if not len(keys) or not self.maxsize:
+            return 0
+        probas = self.model.predict_proba(np.asarray(X, dtype=np.float32)[first])
+        with self._lock:
+            # X is newest first (recent_rows), so insert from its end to keep that recency
+            for j in np.argsort(first)[::-1].tolist():
+                key = int(keys[j])
+                if key not in self._pinned:
+                    self._lru[key] = probas[j]
+                    self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'lru_size': len(self._lru),
+                'lru_maxsize': self.maxsize,
+                'pinned': len(self._pinned),
+            }
+
+
+def load_feature_rows(path, feature_names):
+    """Feature matrix from a CSV with (at least) the named feature columns, without pandas."""
+    rows = []
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        for record in reader:
+            rows.append([float(record[name]) for name in feature_names])
+    return np.asarray(rows, dtype=np.float32).reshape(-1, len(feature_names))
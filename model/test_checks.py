@@ -0,0 +1,513 @@
+"""Parity and regression tests for the serving and dataset tooling, on small synthetic data.
+
+    cd model && python -m pytest -q test_checks.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forest_artifact import load_artifact, save_artifact  # noqa: E402
+from forest_engine import CompiledForest, check_parity  # noqa: E402
+from all_features_extracted import RAW_COLUMNS, convert, convert_parallel  # noqa: E402
+from vectorized_features import FEATURES, check  # noqa: E402
+
+
+def synthetic_dataset(n=1500, seed=0):
+    """REAL_DATASET_FINAL-shaped frame: ternary features and a status that depends on some of them."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({name: rng.choice([-1, 0, 1], size=n) for name in FEATURES})
+    score = df['having_IP_Address'] + df['URL_Length'] + df['Page_rank'] + rng.normal(0, 0.8, n)
+    df['status'] = np.where(score > 0, 'legitimate', 'phishing')
+    return df
+
+
+def synthetic_raw(n=1500, seed=0):
+    """dataset_B-shaped frame with values on both sides of every threshold, and a few NaNs."""
+    rng = np.random.default_rng(seed)
+    raw = {}
+    for column in RAW_COLUMNS[:-1]:
+        if column == 'length_url':
+            values = rng.integers(10, 120, n)
+        elif column in ('nb_at', 'nb_dslash', 'nb_subdomains'):
+            values = rng.integers(0, 4, n)
+        elif column == 'ratio_extHyperlinks':
+            values = rng.random(n).round(3)
+        elif column in ('safe_anchor', 'links_in_tags'):
+            values = (rng.random(n) * 100).round(2)
+        elif column in ('domain_registration_length', 'domain_age'):
+            values = rng.integers(-1, 1000, n)
+        elif column == 'web_traffic':
+            values = rng.choice([0, 500, 999999, 1000000, 1000001, 5000000], n)
+        elif column == 'page_rank':
+            values = rng.integers(0, 10, n)
+        else:
+            values = rng.integers(0, 2, n)
+        raw[column] = values
+    raw['status'] = rng.choice(['legitimate', 'phishing'], n)
+    df = pd.DataFrame(raw)
+    df.loc[rng.choice(n, 5, replace=False), 'page_rank'] = np.nan
+    return df
+
+
+@pytest.fixture(scope='module')
+def forest_files(tmp_path_factory):
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    tmp = tmp_path_factory.mktemp('forest')
+    df = synthetic_dataset()
+    data_path = tmp / 'dataset.csv'
+    df.to_csv(data_path, index=False)
+    X = df.drop(columns=['status', 'Website_traffic'])
+    y = (df['status'] == 'legitimate').astype(int)
+    model = RandomForestClassifier(n_estimators=30, random_state=42).fit(X, y)
+    model_path = tmp / 'model.pkl'
+    joblib.dump(model, model_path)
+    return model, X, str(model_path), str(data_path), tmp
+
+
+def test_compiled_forest_matches_sklearn(forest_files):
+    _, _, model_path, data_path, _ = forest_files
+    assert check_parity(model_path, data_path)
+
+
+def test_compiled_forest_handles_missing_features(forest_files):
+    model, X, _, _, _ = forest_files
+    rows = X.head(200).to_numpy(dtype=np.float32, copy=True)
+    rows[::3, 0] = np.nan
+    rows[1::5, 4] = np.nan
+    frame = pd.DataFrame(rows, columns=X.columns)
+    compiled = CompiledForest.from_sklearn(model)
+    np.testing.assert_array_equal(compiled.predict_proba(rows), model.predict_proba(frame))
+
+
+def test_artifact_round_trip(forest_files):
+    model, X, _, _, tmp = forest_files
+    path = str(tmp / 'model.forest')
+    save_artifact(model, path)
+    loaded = load_artifact(path)
+    assert list(loaded.feature_names_in_) == list(X.columns)
+    rows = X.to_numpy(dtype=np.float32)
+    np.testing.assert_array_equal(loaded.predict_proba(rows), model.predict_proba(X))
+
+
+def test_vectorized_transform_matches_row_transform(tmp_path):
+    path = tmp_path / 'dataset_B.csv'
+    synthetic_raw().to_csv(path, index=False)
+    assert check(str(path))
+
+
+def test_parallel_build_matches_serial(tmp_path):
+    path = tmp_path / 'dataset_B.csv'
+    raw = synthetic_raw()
+    # NaN only near the end, so one shard types the column as float and the others as int
+    raw['page_rank'] = raw['page_rank'].fillna(1)
+    raw.loc[len(raw) - 2, 'ip'] = np.nan
+    raw.to_csv(path, index=False)
+    convert(str(path), str(tmp_path / 'serial.csv'))
+    convert_parallel(str(path), str(tmp_path / 'parallel.csv'), workers=2, shard_bytes=20000)
+    assert (tmp_path / 'serial.csv').read_text() == (tmp_path / 'parallel.csv').read_text()
+
+
+def test_verdict_purge_drops_the_domain_entry(tmp_path):
+    from verdict_cache import VerdictCache
+
+    for path in (None, str(tmp_path / 'verdicts.db')):
+        cache = VerdictCache(by_domain=True, path=path)
+        cache.put('https://login.example.com/a', 1, 'legit')
+        assert cache.get('https://evil.example.com/x')['message'] == 'legit'
+        assert cache.purge(url='https://login.example.com/a') == 2
+        assert cache.get('https://login.example.com/a') is None
+        assert cache.get('https://evil.example.com/x') is None
+        if path:
+            assert VerdictCache(by_domain=True, path=path).get('https://login.example.com/a') is None
+
+
+def test_verdict_purge_reaches_other_workers(tmp_path):
+    from verdict_cache import VerdictCache
+
+    path = str(tmp_path / 'verdicts.db')
+    first, second = VerdictCache(path=path), VerdictCache(path=path)
+    first.put('https://example.com/a', 1, 'legit')
+    second.put('https://example.com/a', 1, 'legit')
+    second.put('https://other.com/', 1, 'legit')
+    first.purge(url='https://example.com/a')
+    assert second.get('https://example.com/a') is None
+    assert second.get('https://other.com/') is not None
+    # verdicts put after the purge survive it, in the worker that purged and in the others
+    first.put('https://example.com/a', 0, 'phishing')
+    second.put('https://example.com/a', 0, 'phishing')
+    assert first.get('https://example.com/a')['message'] == 'phishing'
+    assert second.get('https://example.com/a')['message'] == 'phishing'
+    first.purge(domain='other.com')
+    assert second.get('https://other.com/') is None
+
+
+class SumModel:
+    """predict() is the row sum times `scale`, and fails on rows of the wrong width."""
+
+    def __init__(self, width, scale=1):
+        self.width = width
+        self.scale = scale
+        self.calls = []
+
+    def predict(self, X):
+        assert X.shape[1] == self.width
+        self.calls.append(len(X))
+        return X.sum(axis=1) * self.scale
+
+
+def test_micro_batch_keeps_rows_with_their_model():
+    from concurrent.futures import ThreadPoolExecutor
+    from micro_batcher import MicroBatcher
+
+    old, new = SumModel(3), SumModel(2, scale=10)
+    batcher = MicroBatcher(max_batch=64, window_ms=20)
+    jobs = [(old, [i, 1, 1]) if i % 2 else (new, [i, 1]) for i in range(40)]
+    with ThreadPoolExecutor(40) as pool:
+        results = list(pool.map(lambda job: batcher.predict(job[1], job[0], timeout=5), jobs))
+    assert results == [sum(row) * model.scale for model, row in jobs]
+    assert sum(old.calls) == sum(new.calls) == 20
+
+
+def test_resolver_rejects_option_like_hostnames():
+    from external_features import lookup_domain
+
+    assert lookup_domain('https://login.example.co.uk/a') == 'example.co.uk'
+    assert lookup_domain('http://1.2.3.4/') == '1.2.3.4'
+    for url in ('https://-hfoo.x/', 'https://exa mple.com/', 'evil.com;id'):
+        with pytest.raises(ValueError):
+            lookup_domain(url)
+
+
+def test_resolver_limits_concurrent_lookups_per_source():
+    import asyncio
+    from external_features import FeatureResolver, StaticSource
+
+    class Probe(StaticSource):
+        running = peak = 0
+
+        async def fetch(self, domain):
+            Probe.running += 1
+            Probe.peak = max(Probe.peak, Probe.running)
+            await asyncio.sleep(0.01)
+            Probe.running -= 1
+            return {}
+
+    resolver = FeatureResolver([Probe('probe', {}, timeout=5)], concurrency=3)
+    asyncio.run(resolver.resolve_many([f'https://site{i}.com/' for i in range(20)]))
+    assert Probe.peak == 3
+
+
+def test_resolver_shares_lookups_per_domain_and_expires_them():
+    import asyncio
+    from external_features import FeatureResolver, StaticSource
+
+    now = [0.0]
+    fast = StaticSource('fast', {'DNS_record': 1}, delay=0.01)
+    slow = StaticSource('slow', {'Page_rank': 1}, delay=5, timeout=0.05, fallback={'Page_rank': -1})
+    resolver = FeatureResolver([fast, slow], ttl=3600, error_ttl=60, clock=lambda: now[0])
+    urls = [f'https://{sub}.example{n}.co.uk/page{i}' for n in range(3) for sub in ('www', 'login', 'a.b')
+            for i in range(20)]
+
+    results = asyncio.run(resolver.resolve_many(urls))
+    assert sorted({domain for domain, _ in results}) == ['example0.co.uk', 'example1.co.uk', 'example2.co.uk']
+    # one fetch per source and domain however many URLs asked, and the timed-out source falls back
+    assert (fast.calls, slow.calls) == (3, 3)
+    assert all(features == {'DNS_record': 1, 'Page_rank': -1} for _, features in results)
+
+    now[0] = 59
+    asyncio.run(resolver.resolve_many(urls))
+    assert (fast.calls, slow.calls) == (3, 3)
+    # the failed lookups expire after error_ttl, the good ones only after ttl
+    now[0] = 61
+    asyncio.run(resolver.resolve_many(urls))
+    assert (fast.calls, slow.calls) == (3, 6)
+    now[0] = 3601
+    asyncio.run(resolver.resolve_many(urls))
+    assert (fast.calls, slow.calls) == (6, 9)
+
+
+@pytest.fixture(scope='module')
+def dataset_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('dataset') / 'REAL_DATASET_FINAL.csv'
+    synthetic_dataset().to_csv(path, index=False)
+    return str(path)
+
+
+def test_warm_update_keeps_old_trees_and_fits_only_new_rows(dataset_csv, tmp_path):
+    import joblib
+    from incremental import init, update
+    from label_store import LabelStore
+    from training import load_xy
+
+    store_path, out = str(tmp_path / 'labeled.rows'), str(tmp_path / 'versions')
+    init(store_path, out, dataset_csv)
+    X, y = load_xy(dataset_csv, drop=['Website_traffic'])
+    rows, labels = X.to_numpy(dtype=np.float64), y.to_numpy()
+    store = LabelStore(store_path)
+    for _ in range(4):
+        store.append(rows, labels)
+
+    base = joblib.load(os.path.join(out, 'forest-v0001.pkl'))
+    entry = update(store_path, out, trees=10)
+    grown = joblib.load(os.path.join(out, entry['pickle']))
+    assert entry['n_estimators'] == len(base.estimators_) + 10
+    assert all(np.array_equal(a.tree_.threshold, b.tree_.threshold)
+               for a, b in zip(base.estimators_, grown.estimators_))
+    assert update(store_path, out) is None
+
+    # the cost follows the new rows: they plus as many replayed ones, not the whole store
+    store.append(rows[:300], labels[:300])
+    entry = update(store_path, out, trees=10)
+    assert (entry['rows_new'], entry['rows_fit'], entry['rows_total']) == (300, 600, 5 * len(rows) + 300)
+    # the forest doesn't keep growing: the oldest trees make room for the new ones
+    latest = joblib.load(os.path.join(out, entry['pickle']))
+    assert entry['n_estimators'] == len(base.estimators_) + 10
+    assert np.array_equal(latest.estimators_[0].tree_.threshold, base.estimators_[10].tree_.threshold)
+
+
+def test_single_class_refit_is_not_published(dataset_csv, tmp_path):
+    from incremental import init, read_manifest, update
+    from label_store import LabelStore
+
+    store_path, out = str(tmp_path / 'labeled.rows'), str(tmp_path / 'versions')
+    init(store_path, out, dataset_csv)
+    store = LabelStore(store_path)
+    store.append(np.zeros((5, len(store.features))), ['phishing'] * 5)
+    with pytest.raises(ValueError, match='no class'):
+        update(store_path, out, mode='refit')
+    assert [v['version'] for v in read_manifest(out)['versions']] == [1]
+    # a warm update replays older rows of both classes, so the same reports can go out that way
+    assert update(store_path, out, mode='warm')['version'] == 2
+
+
+def test_label_store_reads_only_complete_records(tmp_path):
+    from label_store import MISSING, LabelStore
+
+    store = LabelStore(str(tmp_path / 'labeled.rows'), ['a', 'b', 'c'])
+    X = np.array([[1, 0, -1], [np.nan, 1, 1], [-1, -1, 0]])
+    assert store.append(X, [1, 0, 1]) == 3
+    # a crash mid-append leaves a partial record behind
+    with open(store.path, 'ab') as f:
+        f.write(bytes([1, 1]))
+    assert len(store) == 3
+    got_X, got_y = store.read()
+    np.testing.assert_array_equal(got_X, X.astype(np.float32))
+    np.testing.assert_array_equal(got_y, [1, 0, 1])
+    # the next append drops the partial record instead of shifting everything after it
+    assert store.append([[0, 0, 0]], [0]) == 4
+    assert store.records()[3].tolist() == [0, 0, 0, 0]
+    assert store.records()[1, 0] == MISSING
+    with pytest.raises(ValueError):
+        store.append([[2, 0, 0]], [1])
+
+
+def test_knn_curve_matches_cross_val_score():
+    from sklearn.datasets import make_classification
+    from sklearn.model_selection import cross_val_score
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from fast_search import knn_cv_curve
+
+    # continuous features, so no two neighbours are at the same distance and the votes match exactly
+    X, y = make_classification(n_samples=600, n_features=8, random_state=0)
+    curve = knn_cv_curve(X, y, max_k=25, n_jobs=1)
+    for k in (1, 2, 5, 10, 25):
+        expected = cross_val_score(make_pipeline(StandardScaler(), KNeighborsClassifier(n_neighbors=k)),
+                                   X, y, cv=5, scoring='accuracy').mean()
+        assert curve[k - 1] == pytest.approx(expected)
+
+
+def test_oob_search_exports_a_plain_forest(forest_files):
+    from fast_search import forest_oob_search
+
+    _, X, _, _, _ = forest_files
+    y = (X['having_IP_Address'] + X['URL_Length'] > 0).astype(int)
+    results, model = forest_oob_search(X, y, sizes=(20, 40), max_depths=(4,), max_features=('sqrt',), n_jobs=1)
+    assert len(model.estimators_) == model.n_estimators
+    assert not model.warm_start
+    assert not hasattr(model, 'oob_decision_function_')
+    best = max(results, key=lambda r: (r['oob_accuracy'], -r['n_estimators']))
+    assert model.oob_score_ == best['oob_accuracy']
+
+
+def test_metrics_add_up_across_workers(tmp_path):
+    from metrics import Registry
+
+    def worker_registry():
+        registry = Registry(str(tmp_path), flush_interval=3600)
+        requests = registry.counter('requests_total', 'Requests', labels=('outcome',))
+        seconds = registry.histogram('seconds', 'Latency', buckets=(0.1, 1.0))
+        registry.gauge('cache_size', 'Entries', lambda: 7)
+        return registry, requests, seconds
+
+    first, first_requests, first_seconds = worker_registry()
+    second, second_requests, second_seconds = worker_registry()
+    first_requests.inc('ok', amount=2)
+    first_seconds.observe(0.05)
+    second_requests.inc('ok', amount=3)
+    second_requests.inc('error')
+    second_seconds.observe(0.5)
+    first.ensure_flushing()
+    first.flush()
+
+    text = second.render()
+    assert 'requests_total{outcome="ok"} 5' in text
+    assert 'requests_total{outcome="error"} 1' in text
+    assert 'seconds_bucket{le="0.1"} 1' in text and 'seconds_bucket{le="1.0"} 2' in text
+    assert 'seconds_count 2' in text
+    assert f'cache_size{{worker="{os.getpid()}"}} 7' in text
+
+
+def test_single_flight_followers_share_the_leaders_exception():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from single_flight import SingleFlight
+
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError('model failed')
+
+    def call(_):
+        try:
+            flight.do('key', failing)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(call, i) for i in range(8)]
+        while flight.stats()['followers'] < 7:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result(5) for f in futures]
+    assert results == ['model failed'] * 8
+    assert len(calls) == 1
+    assert flight.stats()['in_flight'] == 0
+    # nothing is remembered once the call is over
+    assert flight.do('key', lambda: 42) == (42, False)
+
+
+def test_micro_batch_results_reach_their_callers_within_max_batch():
+    from concurrent.futures import ThreadPoolExecutor
+    from micro_batcher import MicroBatcher
+
+    sizes = []
+    batcher = MicroBatcher(lambda X: X[:, 0] * 10 + X[:, 1], max_batch=4, window_ms=20, on_batch=sizes.append)
+    rows = [[i, i % 3] for i in range(30)]
+    with ThreadPoolExecutor(30) as pool:
+        results = list(pool.map(lambda row: batcher.predict(row, timeout=5), rows))
+    assert results == [i * 10 + i % 3 for i in range(30)]
+    assert sum(sizes) == 30 and max(sizes) <= 4 and len(sizes) >= 8
+
+    # queued rows go out in submission order
+    futures = [batcher.submit([i, 0]) for i in range(10)]
+    assert [f.result(5) for f in futures] == [i * 10 for i in range(10)]
+
+
+def test_micro_batch_failure_reaches_every_caller_of_that_batch():
+    from micro_batcher import MicroBatcher
+
+    def predict(X):
+        raise RuntimeError('bad batch')
+
+    batcher = MicroBatcher(predict, window_ms=20)
+    futures = [batcher.submit([i]) for i in range(5)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match='bad batch'):
+            future.result(5)
+    # the worker thread survives and keeps scoring the rows sent with a working model
+    assert batcher.predict([1, 2, 3], SumModel(3), timeout=5) == 6
+
+
+class CountingModel:
+    """predict_proba() of a fixed rule, remembering how many rows it was asked for."""
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        self.rows += len(X)
+        p = (np.nan_to_num(X[:, 0]) + 1) / 4
+        return np.column_stack([1 - p, p])
+
+
+def test_pack_rows_bypasses_non_ternary_rows():
+    from ternary_cache import pack_rows, unpack_keys
+
+    X = np.array([[1, 0, -1], [0.5, 0, 0], [np.nan, 1, 1], [2, 0, 0], [-1, -1, -1]], dtype=np.float32)
+    keys = pack_rows(X)
+    assert keys[1] == keys[2] == keys[3] == -1
+    assert keys[0] >= 0 and keys[4] == 0
+    np.testing.assert_array_equal(unpack_keys(keys[[0, 4]], 3), X[[0, 4]])
+
+
+def test_memo_predictor_evicts_least_recent_and_keeps_pinned():
+    from ternary_cache import MemoPredictor
+
+    model = CountingModel()
+    memo = MemoPredictor(model, maxsize=2)
+    pinned, a, b, c = ([1, 1, 1], [1, 0, 0], [0, 1, 0], [-1, 0, 1])
+    assert memo.precompute([pinned, pinned]) == 1
+    memo.predict_proba([a, b])
+    memo.predict_proba([a])          # a is now more recent than b
+    memo.predict_proba([c])          # evicts b
+    assert memo.stats()['lru_size'] == 2
+    model.rows = 0
+    memo.predict_proba([a, c, pinned])
+    assert model.rows == 0
+    memo.predict_proba([b])
+    assert model.rows == 1
+    # pinned entries never count against the LRU or get evicted
+    for row in ([0, 0, 0], [0, 0, 1], [0, 1, 1]):
+        memo.predict_proba([row])
+    model.rows = 0
+    memo.predict_proba([pinned])
+    assert model.rows == 0
+    assert (memo.stats()['lru_size'], memo.stats()['pinned']) == (2, 1)
+
+
+def test_memo_predictor_scores_non_ternary_rows_without_caching_them():
+    from ternary_cache import MemoPredictor
+
+    model = CountingModel()
+    memo = MemoPredictor(model)
+    X = np.array([[np.nan, 0, 0], [0.5, 0, 0], [1, 0, 0]], dtype=np.float32)
+    np.testing.assert_array_equal(memo.predict_proba(X), model.predict_proba(X))
+    memo.predict_proba(X)
+    stats = memo.stats()
+    assert (stats['bypassed'], stats['misses'], stats['hits'], stats['lru_size']) == (4, 1, 1, 1)
+
+
+def test_exported_labels_match_the_training_encoding(dataset_csv, forest_files, tmp_path):
+    from forest_artifact import read_header
+    from training import LABEL_NAMES, SERVED_DROP, export_forest, load_xy
+
+    X, y = load_xy(dataset_csv, drop=SERVED_DROP)
+    raw = pd.read_csv(dataset_csv)
+    assert not set(SERVED_DROP) & set(X.columns)
+    assert [LABEL_NAMES[label] for label in y] == raw['status'].tolist()
+
+    model = forest_files[0]
+    path = str(tmp_path / 'model.forest')
+    export_forest(model, path, model='compact candidate', test_accuracy=0.9)
+    header = read_header(path)
+    assert header['label_names'] == {str(k): v for k, v in LABEL_NAMES.items()}
+    assert header['metadata']['model'] == 'compact candidate'
+    assert header['feature_names'] == list(X.columns)
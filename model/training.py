@@ -0,0 +1,188 @@
+"""Training and evaluation for the models in model_implementation.py.
+
+Each train_* function fits one model and returns it, and evaluate() prints
+the accuracy, classification report and confusion matrix. Estimators are
+imported inside the function that needs them, and TensorFlow only inside
+train_lstm(), so training one model only loads that model's dependencies:
+
+    python training.py random_forest --export random_forest_model.forest
+    python training.py lstm --features url --epochs 20
+"""
+
+import argparse
+import time
+
+from dataset import CONTENT_FEATURES, DATASET, EXTERNAL_FEATURES, URL_FEATURES, encode_status, load_dataset
+
+# the served forest is trained without Website_traffic
+SERVED_DROP = ['Website_traffic']
+# how load_xy encodes status, written into every exported artifact
+LABEL_NAMES = {0: 'phishing', 1: 'legitimate'}
+
+FEATURE_GROUPS = {
+    'all': None,
+    'url': URL_FEATURES,
+    'content': CONTENT_FEATURES,
+    'external': EXTERNAL_FEATURES,
+}
+
+
+def load_xy(path=DATASET, features=None, drop=()):
+    """Features and 1/0 status from the dataset, optionally only some feature columns."""
+    df = load_dataset(path, columns=None if features is None else features + ['status'])
+    df = encode_status(df.drop(columns=[col for col in ['url', *drop] if col in df.columns]))
+    return df.drop(columns=['status']), df['status']
+
+
+def split(X, y, test_size=0.2, seed=42):
+    from sklearn.model_selection import train_test_split
+    return train_test_split(X, y, test_size=test_size, random_state=seed)
+
+
+def evaluate(y_test, y_pred):
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+
+    accuracy = accuracy_score(y_test, y_pred)
+    print("Accuracy:", accuracy)
+    print("\nClassification Report:\n", classification_report(y_test, y_pred))
+    print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
+    return accuracy
+
+
+def ranked(columns, values, name='Importance'):
+    import pandas as pd
+    return pd.DataFrame({'Feature': columns, name: values}).sort_values(by=name, ascending=False)
+
+
+def train_random_forest(X_train, y_train, **params):
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(random_state=42, **params).fit(X_train, y_train)
+
+
+def train_decision_tree(X_train, y_train, **params):
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier(random_state=42, **params).fit(X_train, y_train)
+
+
+def train_logistic_regression(X_train, y_train):
+    from sklearn.linear_model import LogisticRegression
+    # max_iter raised so it converges
+    return LogisticRegression(max_iter=1000, random_state=42).fit(X_train, y_train)
+
+
+def train_naive_bayes(X_train, y_train):
+    from sklearn.naive_bayes import GaussianNB
+    return GaussianNB().fit(X_train, y_train)
+
+
+def train_svm(X_train, y_train):
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.svm import SVC
+    return make_pipeline(StandardScaler(), SVC(kernel='rbf', random_state=42)).fit(X_train, y_train)
+
+
+def train_knn(X_train, y_train, k=5):
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    return make_pipeline(StandardScaler(), KNeighborsClassifier(n_neighbors=k)).fit(X_train, y_train)
+
+
+def train_lstm(X_train, y_train, epochs=20, batch_size=32, validation_data=None, verbose=0):
+    """Two-layer LSTM over each row as a one-step sequence; returns (predict, keras model, history)."""
+    import numpy as np
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from tensorflow.keras.layers import LSTM, Dense, Dropout
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.utils import to_categorical
+
+    scaler = StandardScaler().fit(X_train)
+    encoder = LabelEncoder().fit(y_train)
+    n_classes = len(encoder.classes_)
+
+    def prepare(X):
+        # (samples, timesteps, features) with one timestep per row
+        return scaler.transform(X)[:, None, :]
+
+    model = Sequential()
+    model.add(LSTM(50, return_sequences=True, input_shape=(1, np.shape(X_train)[1])))
+    model.add(Dropout(0.2))
+    model.add(LSTM(50, return_sequences=False))
+    model.add(Dropout(0.2))
+    model.add(Dense(25, activation='relu'))
+    model.add(Dense(n_classes, activation='softmax'))
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+
+    if validation_data is not None:
+        X_val, y_val = validation_data
+        validation_data = (prepare(X_val), to_categorical(encoder.transform(y_val), n_classes))
+    history = model.fit(prepare(X_train), to_categorical(encoder.transform(y_train), n_classes),
+                        epochs=epochs, batch_size=batch_size, validation_data=validation_data, verbose=verbose)
+
+    def predict(X):
+        return encoder.inverse_transform(np.argmax(model.predict(prepare(X), verbose=0), axis=1))
+
+    return predict, model, history
+
+
+def export_forest(forest, path, **metadata):
+    """Write a fitted forest as the memory-mapped .forest artifact modelServer.py loads.
+
+    Every exporter goes through here, so artifacts carry the LABEL_NAMES load_xy encodes.
+    metadata adds to (or overrides) the model type, its scalar params and the sklearn version.
+    """
+    import sklearn
+    from forest_artifact import save_artifact
+
+    return save_artifact(
+        forest,
+        path,
+        label_names=LABEL_NAMES,
+        metadata={
+            'model': type(forest).__name__,
+            'params': {k: v for k, v in forest.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+            'sklearn_version': sklearn.__version__,
+            **metadata,
+        },
+    )
+
+
+TRAINERS = {
+    'random_forest': train_random_forest,
+    'decision_tree': train_decision_tree,
+    'logistic_regression': train_logistic_regression,
+    'naive_bayes': train_naive_bayes,
+    'svm': train_svm,
+    'knn': train_knn,
+    'lstm': train_lstm,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train and evaluate one model')
+    parser.add_argument('model', choices=list(TRAINERS))
+    parser.add_argument('--data', default=DATASET)
+    parser.add_argument('--features', choices=list(FEATURE_GROUPS), default='all')
+    parser.add_argument('--epochs', type=int, default=20, help='LSTM epochs')
+    parser.add_argument('--export', metavar='PATH', help='write a random forest / decision tree as a .forest artifact')
+    args = parser.parse_args()
+
+    drop = SERVED_DROP if args.model == 'random_forest' and args.features == 'all' else []
+    X, y = load_xy(args.data, FEATURE_GROUPS[args.features], drop)
+    X_train, X_test, y_train, y_test = split(X, y)
+
+    start = time.perf_counter()
+    if args.model == 'lstm':
+        predict, model, _ = train_lstm(X_train, y_train, epochs=args.epochs, validation_data=(X_test, y_test), verbose=1)
+    else:
+        model = TRAINERS[args.model](X_train, y_train)
+        predict = model.predict
+    print(f"Trained {args.model} on {len(X_train)} rows in {time.perf_counter() - start:.2f} s")
+    accuracy = evaluate(y_test, predict(X_test))
+
+    if args.export:
+        if args.model not in ('random_forest', 'decision_tree'):
+            parser.error('--export needs a tree model')
+        export_forest(model, args.export, train_rows=len(X_train), test_rows=len(X_test), test_accuracy=accuracy)
+        print(f"Exported to {args.export}")
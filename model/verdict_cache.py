@@ -0,0 +1,205 @@
+"""Verdict cache keyed by normalized URL (and optionally registered domain).
+
+An LRU of recent verdicts, each with a TTL chosen by its message: short for
+phishing/malicious so a cleaned-up site isn't blocked for long, long for
+legit. Hits are a dict lookup, so /verdict answers without extraction or
+a model call.
+
+With a path the cache is also written through to a SQLite file and the
+unexpired entries are loaded back on start, so restarts don't lose it.
+Under gunicorn every worker keeps its own LRU in front of the shared file,
+and the file is authoritative for purges: each purge is also logged there,
+and get() replays the purges other workers logged since its last look
+before it answers from its LRU. Without a path a purge only reaches the
+process that handled it.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+from external_features import registered_domain
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """Lower-case scheme and host, drop default ports and fragments, give an empty path '/'."""
+    parts = urlsplit(url.strip() if '//' in url else f'http://{url.strip()}')
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+class VerdictCache:
+    def __init__(self, maxsize=100000, ttls=None, default_ttl=3600.0, by_domain=False, path=None):
+        self.maxsize = maxsize
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.by_domain = by_domain
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # one connection per thread, so writes don't need the LRU lock
+        self._local = threading.local()
+        # id of the last purge log row applied to this process's LRU
+        self._seen_purge = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        if path:
+            self._load()
+
+    def _db(self):
+        # sqlite connections must not cross a fork, so each worker opens its own
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # under WAL a commit without fsync can only lose the last writes on power loss, not corrupt the file;
+            # a lost verdict is a cache miss
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS verdicts '
+                         '(key TEXT PRIMARY KEY, prediction INTEGER, message TEXT, created REAL, expires REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS purges '
+                         '(id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, domain TEXT, at REAL)')
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _load(self):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute('DELETE FROM verdicts WHERE expires <= ?', (now,))
+            rows = db.execute('SELECT key, prediction, message, created, expires FROM verdicts '
+                              'ORDER BY created DESC LIMIT ?', (self.maxsize,)).fetchall()
+            for key, prediction, message, created, expires in reversed(rows):
+                self._entries[key] = {'prediction': prediction, 'message': message,
+                                      'created': created, 'expires': expires}
+            self._seen_purge = db.execute('SELECT coalesce(max(id), 0) FROM purges').fetchone()[0]
+
+    def _sync(self):
+        """Apply the purges logged by other processes since the last call; caller holds the lock."""
+        rows = self._db().execute('SELECT id, key, domain, at FROM purges WHERE id > ? ORDER BY id',
+                                  (self._seen_purge,)).fetchall()
+        for purge_id, key, domain, at in rows:
+            # verdicts put here after the purge are newer than what it removed
+            self._drop(keys=None if key is None else [key], domain=domain, before=at)
+            self._seen_purge = purge_id
+
+    def keys_for(self, url):
+        key = normalize_url(url)
+        if not self.by_domain:
+            return [key]
+        return [key, 'domain:' + registered_domain(urlsplit(key).hostname)]
+
+    def get(self, url):
+        now = time.time()
+        keys = self.keys_for(url)
+        with self._lock:
+            if self.path:
+                self._sync()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry['expires'] <= now:
+                    del self._entries[key]
+                    self.expired += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, url, prediction, message):
+        now = time.time()
+        entry = {'prediction': prediction, 'message': message, 'created': now,
+                 'expires': now + self.ttls.get(message, self.default_ttl)}
+        keys = self.keys_for(url)
+        with self._lock:
+            for key in keys:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        if self.path:
+            # outside the lock, so lookups don't wait on the disk; a purge that landed since
+            # this verdict was made wins, the way the LRU side handles it in _sync
+            self._db().executemany(
+                'INSERT OR REPLACE INTO verdicts SELECT ?, ?, ?, ?, ? '
+                'WHERE ? > coalesce((SELECT at FROM purges ORDER BY id DESC LIMIT 1), 0)',
+                [(key, prediction, message, entry['created'], entry['expires'], entry['created']) for key in keys])
+        return entry
+
+    @staticmethod
+    def _on_domain(key, domain):
+        host = key[len('domain:'):] if key.startswith('domain:') else urlsplit(key).hostname
+        return registered_domain(host) == domain
+
+    def _drop(self, keys=None, domain=None, before=None):
+        """Remove keys, or every entry on domain, or everything; caller holds the lock."""
+        if keys is None:
+            keys = [k for k in self._entries if domain is None or self._on_domain(k, domain)]
+        if before is not None:
+            keys = [k for k in keys if k in self._entries and self._entries[k]['created'] <= before]
+        return sum(self._entries.pop(k, None) is not None for k in keys)
+
+    def purge(self, url=None, domain=None):
+        """Drop one URL, every entry on a registered domain, or everything when neither is given.
+
+        A URL purge also drops its domain entry when caching by domain, since
+        that entry would otherwise keep answering for the URL.
+        """
+        keys = None
+        if url is not None:
+            keys = self.keys_for(url)
+            domain = None
+        elif domain is not None:
+            domain = registered_domain(domain)
+        with self._lock:
+            removed = self._drop(keys=keys, domain=domain)
+            if self.path:
+                now = time.time()
+                db = self._db()
+                db.execute('BEGIN IMMEDIATE')
+                try:
+                    self._sync()
+                    if keys is not None:
+                        db.executemany('DELETE FROM verdicts WHERE key = ?', [(k,) for k in keys])
+                        db.executemany('INSERT INTO purges (key, at) VALUES (?, ?)', [(k, now) for k in keys])
+                    elif domain is not None:
+                        # also the entries only on disk, e.g. written by other workers
+                        on_disk = [k for (k,) in db.execute('SELECT key FROM verdicts') if self._on_domain(k, domain)]
+                        db.executemany('DELETE FROM verdicts WHERE key = ?', [(k,) for k in on_disk])
+                        db.execute('INSERT INTO purges (domain, at) VALUES (?, ?)', (domain, now))
+                    else:
+                        db.execute('DELETE FROM verdicts')
+                        db.execute('INSERT INTO purges (at) VALUES (?)', (now,))
+                    # an entry older than the longest TTL has expired anyway, so its purge needn't be replayed
+                    longest = max([self.default_ttl, *self.ttls.values()])
+                    db.execute('DELETE FROM purges WHERE at < ?', (now - longest,))
+                    # this process has already applied its own purge
+                    self._seen_purge = db.execute('SELECT coalesce(max(id), 0) FROM purges').fetchone()[0]
+                    db.execute('COMMIT')
+                except BaseException:
+                    db.execute('ROLLBACK')
+                    raise
+        return removed
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
@@ -0,0 +1,161 @@
+"""Vectorized version of the all_features_extracted.py transform.
+
+Same thresholds and the same byte-for-byte CSV output as transform_rows()
+in all_features_extracted.py, but each feature is one np.select/np.where
+over the whole column instead of a Python call per row, and the features
+come out as int8 columns.
+
+Check it against the original on a sample and get a timing report with:
+
+    python vectorized_features.py --check dataset_B_05_2020.csv
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# -1 = phishing
+#  0 = suspicious
+#  1 = legitimate
+
+
+def flag_bad(x):
+    # 1 in the raw data is the phishing signal, anything other than 0/1 passes through
+    return np.select([x == 1, x == 0], [-1, 1], default=x)
+
+
+def flag_good(x):
+    return np.select([x == 1, x == 0], [1, -1], default=x)
+
+
+def count_bad(x):
+    return np.select([x >= 1, x == 0], [-1, 1], default=x)
+
+
+def url_length(x):
+    return np.select([x < 54, (54 <= x) & (x <= 75)], [1, 0], default=-1)
+
+
+def sub_domains(x):
+    return np.select([x == 1, x == 2], [1, 0], default=-1)
+
+
+def registration_length(days):
+    return np.where(days <= 365, -1, 1)
+
+
+def ext_hyperlinks(ratio):
+    return np.select([ratio <= 0.22, (ratio > 0.22) & (ratio <= 0.61)], [1, 0], default=-1)
+
+
+def url_anchor(ratio):
+    # RATIO are like *100 so its their percent number not the number from 0 to 1
+    ratio = 1 - 0.01 * ratio
+    return np.select([ratio < 0.31, (0.31 <= ratio) & (ratio <= 0.67)], [1, 0], default=-1)
+
+
+def links_tags(ratio):
+    ratio = 1 - 0.01 * ratio
+    return np.select([ratio < 0.17, (ratio >= 0.17) & (ratio <= 0.81)], [1, 0], default=-1)
+
+
+def domain_age(days):
+    return np.where(days >= 180, 1, -1)
+
+
+def traffic(visitors):
+    return np.select([visitors > 1000000, (visitors <= 1000000) & (visitors > 0)], [0, 1], default=-1)
+
+
+def page_rank(pr):
+    return np.where(pr < 2, -1, 1)
+
+
+# output column -> (raw dataset_B column, transform), in REAL_DATASET_FINAL.csv order
+FEATURES = {
+    'having_IP_Address': ('ip', flag_bad),
+    'URL_Length': ('length_url', url_length),
+    'Shortining_Service': ('shortening_service', flag_bad),
+    'having_At_Symbol': ('nb_at', count_bad),
+    'double_slash_redirecting': ('nb_dslash', count_bad),
+    'Prefix_Suffix': ('prefix_suffix', flag_bad),
+    'having_Sub_Domain': ('nb_subdomains', sub_domains),
+    'Domain_Registeration_Length': ('domain_registration_length', registration_length),
+    'Favicon': ('external_favicon', flag_bad),
+    'Port': ('port', flag_bad),
+    'HTTPS_token': ('https_token', flag_good),
+    'Request_URL': ('ratio_extHyperlinks', ext_hyperlinks),
+    'Anchor_URL': ('safe_anchor', url_anchor),
+    'Links_in_Tags': ('links_in_tags', links_tags),
+    'Abnormal_URL': ('whois_registered_domain', flag_good),
+    'Domain_age': ('domain_age', domain_age),
+    'DNS_record': ('dns_record', flag_good),
+    'Website_traffic': ('web_traffic', traffic),
+    'Page_rank': ('page_rank', page_rank),
+    'Google_Index': ('google_index', flag_good),
+}
+
+OUTPUT_COLUMNS = list(FEATURES) + ['status']
+
+
+def compact(values):
+    """int8 when every value is a small integer, otherwise leave the dtype alone.
+
+    Values passed through from odd raw data (NaN, fractions, big numbers) keep
+    the float/int64 dtype pandas would have given them so the CSV text matches.
+    """
+    if values.dtype.kind == 'f':
+        if np.isnan(values).any() or not np.array_equal(values, np.round(values)):
+            return values
+    if values.size and (values.min() < -128 or values.max() > 127):
+        return values.astype(np.int64)
+    return values.astype(np.int8)
+
+
+def transform(df):
+    out = {}
+    for name, (raw, fn) in FEATURES.items():
+        out[name] = compact(fn(df[raw].to_numpy()))
+    out['status'] = df['status'].to_numpy()
+    return pd.DataFrame(out, index=df.index, columns=OUTPUT_COLUMNS)
+
+
+def check(input_csv, rows=None):
+    from all_features_extracted import transform_rows
+
+    raw = pd.read_csv(input_csv, nrows=rows)
+
+    start = time.perf_counter()
+    expected = transform_rows(raw.copy())
+    apply_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = transform(raw)
+    vector_time = time.perf_counter() - start
+
+    same = expected.to_csv(index=False) == got.to_csv(index=False)
+    print(f"Rows:              {len(raw)}")
+    print(f"apply transform:   {apply_time * 1000:.1f} ms")
+    print(f"vectorized:        {vector_time * 1000:.1f} ms ({apply_time / max(vector_time, 1e-9):.0f}x)")
+    print(f"memory (features): {expected.memory_usage(deep=True).sum() / 1e6:.2f} MB -> "
+          f"{got.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+    print("CSV output is byte-identical" if same else "MISMATCH: CSV output differs")
+    if not same:
+        for col in OUTPUT_COLUMNS:
+            diff = (expected[col].astype(str) != got[col].astype(str)).sum()
+            if diff:
+                print(f"  {col}: {diff} rows differ")
+    return same
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Vectorized feature transform')
+    parser.add_argument('--check', metavar='CSV', help='compare against all_features_extracted.transform_rows on this raw dataset')
+    parser.add_argument('--rows', type=int, help='only use the first N rows for --check')
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if check(args.check, args.rows) else 1)
+    parser.print_help()